@@ -0,0 +1,331 @@
+"""
+Local stand-in for the MAHE SLCM Lightning pages maa.py drives.
+
+Only the DOM the script relies on is reproduced: the Home nav bar
+(a[title='Calendar']), the Calendar's #calendarSidebar datepicker and
+.calendarRow.slds-scrollable_y day list (h2.slds-assistive-text headings,
+.calendarDay panels, a.subject-link tiles with a "More Details" popover), the
+event record page with its Attendance tab table (lightning-base-formatted-text
+IDs + checkboxes) and the Submit Attendance → Confirm Submission modal.
+
+Render delays, roster size and injected "This page has an error" failures on
+the Attendance tab are configurable; submissions are kept in memory so a
+benchmark can check what was saved.
+"""
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULTS = {
+    "courses": 1,          # workbooks / courses with one class per benchmark date
+    "roster": 60,          # students per class
+    "distractors": 2,      # other sections' tiles on every day
+    "page_delay": 0.3,     # server response time of a full page load (s)
+    "render_delay": 0.4,   # spinner before the calendar / day list / record renders (s)
+    "tile_delay": 0.2,     # day panels fill in after their headings (s)
+    "tab_delay": 0.5,      # Attendance tab content (s)
+    "submit_delay": 0.8,   # Confirm Submission → toast (s)
+    "error_rate": 0.0,     # chance an Attendance tab load shows the Lightning page error
+    "popover": True,       # tile click opens a "More Details" popover instead of navigating
+    "seed": 1,
+}
+
+SEMESTER = "V"
+SECTION = "B"
+
+def course_code(i):
+    return f"MOCK{3100 + i}"
+
+def reg_no(course, n):
+    return str(230900000 + course * 10000 + n)
+
+def bench_dates(start=date(2025, 7, 28), count=5):
+    """Weekdays from `start`; the default crosses a month boundary."""
+    out, d = [], start
+    while len(out) < count:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+class MockPortal:
+    """Serve the mock portal from a background thread: `with MockPortal(dates, **cfg) as portal:`."""
+
+    def __init__(self, dates, host="127.0.0.1", port=0, **config):
+        self.config = dict(DEFAULTS, **config)
+        self.dates = sorted(dates)
+        self.today = self.dates[-1] + timedelta(days=14)  # the Calendar opens on a later month
+        self.rng = random.Random(self.config["seed"])
+        self.lock = threading.Lock()
+        self.events = {}  # event id -> {course, date, text}
+        for c in range(self.config["courses"]):
+            for d in self.dates:
+                text = f"{course_code(c)} Mock Lab - Semester {SEMESTER} - Sec {SECTION}"
+                self.events[self.event_for(c, d)] = {"course": c, "date": d, "text": text}
+        self.saved = {}   # event id -> {reg: checked}
+        self.stats = {"pages": 0, "errors_injected": 0, "submissions": 0}
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.portal = self
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        with self.lock:
+            self.saved.clear()
+            self.stats = {"pages": 0, "errors_injected": 0, "submissions": 0}
+
+    def event_for(self, course, d):
+        return f"00U{course:02d}{d:%Y%m%d}"
+
+    # --- page model ---
+    def roster(self, eid):
+        ev = self.events[eid]
+        saved = self.saved.get(eid, {})
+        return [{"reg": reg_no(ev["course"], n), "name": f"Student {ev['course']}-{n:03d}",
+                 "checked": saved.get(reg_no(ev["course"], n), True)}
+                for n in range(1, self.config["roster"] + 1)]
+
+    def tiles(self):
+        out = []
+        for eid, ev in self.events.items():
+            out.append({"date": ev["date"].isoformat(), "text": ev["text"],
+                        "href": f"/lightning/r/Event/{eid}/view"})
+            for k in range(self.config["distractors"]):
+                sec = ["A", f"{SECTION}-1", "C"][k % 3]
+                out.append({"date": ev["date"].isoformat(),
+                            "text": f"{course_code(ev['course'])} Mock Lab - Semester {SEMESTER} - Sec {sec}",
+                            "href": f"/lightning/r/Event/00X{k}{eid[3:]}/view"})
+        return out
+
+    def page_state(self, path):
+        cfg = self.config
+        state = {
+            "today": self.today.isoformat(),
+            "delays": {k: int(cfg[k] * 1000) for k in ("render_delay", "tile_delay", "tab_delay", "submit_delay")},
+            "popover": cfg["popover"],
+            "tiles": self.tiles(),
+        }
+        if path.startswith("/lightning/r/Event/"):
+            eid = path.split("/")[4]
+            if eid not in self.events:
+                state["missing"] = True
+                return state
+            with self.lock:
+                error = self.rng.random() < cfg["error_rate"]
+                if error:
+                    self.stats["errors_injected"] += 1
+            state.update(record=eid, title=self.events[eid]["text"], roster=self.roster(eid),
+                         attendanceError=error)
+        return state
+
+    def submit(self, eid, rows):
+        with self.lock:
+            self.saved[eid] = {str(k): bool(v) for k, v in rows.items()}
+            self.stats["submissions"] += 1
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body, ctype="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        portal = self.server.portal
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/lightning", "/lightning/"):
+            self.send_response(302)
+            self.send_header("Location", "/lightning/page/home")
+            self.end_headers()
+            return
+        if path == "/mock/stats":
+            return self._send(200, json.dumps(portal.stats), "application/json")
+        if not path.startswith("/lightning/"):
+            return self._send(404, "not found", "text/plain")
+        time.sleep(portal.config["page_delay"])
+        with portal.lock:
+            portal.stats["pages"] += 1
+        state = portal.page_state(path)
+        self._send(404 if state.get("missing") else 200, PAGE.replace("__STATE__", json.dumps(state)))
+
+    def do_POST(self):
+        portal = self.server.portal
+        path = self.path.split("?", 1)[0]
+        if not path.startswith("/mock/submit/"):
+            return self._send(404, "not found", "text/plain")
+        eid = path.rsplit("/", 1)[1]
+        if eid not in portal.events:
+            return self._send(404, "{}", "application/json")
+        length = int(self.headers.get("Content-Length") or 0)
+        portal.submit(eid, json.loads(self.rfile.read(length) or b"{}"))
+        self._send(200, "{}", "application/json")
+
+PAGE = r"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Mock Lightning</title>
+<style>
+body { font-family: sans-serif; margin: 0; }
+nav { padding: 8px; background: #0176d3; } nav a { color: #fff; margin-right: 16px; }
+.slds-spinner_container { position: fixed; inset: 0; background: rgba(255,255,255,.6); }
+.slds-spinner { width: 40px; height: 40px; margin: 20% auto; border: 4px solid #0176d3; border-radius: 50%; }
+#calendar { display: flex; } #calendarSidebar { width: 260px; padding: 8px; }
+.slds-day { display: inline-block; width: 28px; cursor: pointer; }
+.calendarRow.slds-scrollable_y { height: 600px; overflow-y: auto; flex: 1; }
+.calendarDay { min-height: 180px; border-bottom: 1px solid #ddd; }
+a.subject-link { display: block; margin: 6px 0; }
+.slds-popover { position: fixed; top: 120px; right: 40px; padding: 12px; background: #fff; border: 1px solid #999; }
+.slds-modal { position: fixed; inset: 0; background: rgba(0,0,0,.4); }
+.slds-modal__container { background: #fff; width: 400px; margin: 15% auto; padding: 16px; }
+.slds-notify_toast { position: fixed; top: 8px; left: 40%; padding: 12px; background: #2e844a; color: #fff; }
+</style></head>
+<body>
+<nav><a title="Home" href="/lightning/page/home">Home</a><a title="Calendar" href="/lightning/o/Event/home">Calendar</a></nav>
+<main id="app"></main>
+<script>
+const S = __STATE__;
+const app = document.getElementById('app');
+const MONTHS = ['January','February','March','April','May','June','July','August','September','October','November','December'];
+function el(tag, attrs, html){ const e = document.createElement(tag); Object.assign(e, attrs || {}); if (html != null) e.innerHTML = html; return e; }
+function iso(d){ return d.getFullYear() + '-' + String(d.getMonth() + 1).padStart(2, '0') + '-' + String(d.getDate()).padStart(2, '0'); }
+function parse(s){ const [y, m, d] = s.split('-').map(Number); return new Date(y, m - 1, d); }
+function later(ms, fn){
+  const sp = el('div', {className: 'slds-spinner_container'}, '<div class="slds-spinner"></div>');
+  document.body.appendChild(sp);
+  setTimeout(() => { sp.remove(); fn(); }, ms);
+}
+
+// --- Calendar: mini datepicker + month day list ---
+let shown = S.today ? parse(S.today) : new Date();
+function renderSidebar(){
+  const side = document.getElementById('calendarSidebar');
+  const y = shown.getFullYear(), m = shown.getMonth();
+  let cells = '';
+  for (let d = 1; d <= new Date(y, m + 1, 0).getDate(); d++) cells += '<td><span class="slds-day">' + d + '</span></td>';
+  side.innerHTML = '<div class="slds-datepicker"><div class="slds-datepicker__filter">'
+    + '<button title="Previous Month">&lt;</button><h2>' + MONTHS[m] + ' ' + y + '</h2>'
+    + '<button title="Next Month">&gt;</button></div><table class="datepicker"><tr>' + cells + '</tr></table></div>';
+  side.querySelector('[title="Previous Month"]').onclick = () => { shown = new Date(y, m - 1, 1); renderSidebar(); };
+  side.querySelector('[title="Next Month"]').onclick = () => { shown = new Date(y, m + 1, 1); renderSidebar(); };
+  side.querySelectorAll('.slds-day').forEach(n => n.onclick = () => later(S.delays.render_delay, () =>
+    renderDays(new Date(y, m, parseInt(n.textContent, 10)))));
+}
+function renderDays(selected){
+  const list = document.getElementById('dayList');
+  list.innerHTML = ''; list.scrollTop = 0;
+  const y = selected.getFullYear(), m = selected.getMonth(), panels = [];
+  for (let d = 1; d <= new Date(y, m + 1, 0).getDate(); d++) {
+    const day = new Date(y, m, d);
+    list.appendChild(el('h2', {className: 'slds-assistive-text'},
+      day.toLocaleDateString('en-US', {weekday: 'long', month: 'long', day: 'numeric'})));
+    const panel = el('div', {className: 'calendarDay'});
+    list.appendChild(panel);
+    panels.push([iso(day), panel]);
+  }
+  setTimeout(() => {
+    for (const [key, panel] of panels) {
+      for (const t of S.tiles.filter(t => t.date === key)) {
+        const a = el('a', {className: 'subject-link', href: t.href, textContent: t.text});
+        if (S.popover) a.onclick = ev => { ev.preventDefault(); showPopover(t.href); };
+        panel.appendChild(a);
+      }
+    }
+  }, S.delays.tile_delay);
+}
+function showPopover(href){
+  const old = document.querySelector('.slds-popover'); if (old) old.remove();
+  const pop = el('section', {className: 'slds-popover'});
+  pop.appendChild(el('a', {href: href, textContent: 'More Details'}));
+  document.body.appendChild(pop);
+}
+function renderCalendar(){
+  app.innerHTML = '<div id="calendar"><div id="calendarSidebar"></div><div class="calendarRow slds-scrollable_y" id="dayList"></div></div>';
+  renderSidebar();
+  renderDays(shown);
+}
+
+// --- Event record: Attendance tab, submit + confirm modal, toast ---
+function renderRecord(){
+  app.innerHTML = '<h1>' + S.title + '</h1><ul class="slds-tabs_default__nav">'
+    + '<li><a data-label="Details">Details</a></li>'
+    + '<li><a data-label="Attendance"><span class="title">Attendance</span></a></li></ul><div id="tabBody"></div>';
+  app.querySelector("a[data-label='Attendance']").onclick = () => later(S.delays.tab_delay, renderAttendance);
+}
+function renderAttendance(){
+  const body = document.getElementById('tabBody');
+  if (S.attendanceError) {
+    body.innerHTML = '<div class="slds-text-color_error">This page has an error. You might just need to refresh it.</div>';
+    return;
+  }
+  let rows = '';
+  for (const r of S.roster) {
+    rows += '<tr><td><input type="checkbox"' + (r.checked ? ' checked' : '') + '></td>'
+      + '<td><lightning-base-formatted-text>' + r.reg + '</lightning-base-formatted-text></td>'
+      + '<td><lightning-base-formatted-text>' + r.name + '</lightning-base-formatted-text></td></tr>';
+  }
+  body.innerHTML = '<table><tbody>' + rows + '</tbody></table>'
+    + '<button class="slds-button slds-button_brand" id="submitBtn">Submit Attendance</button>';
+  document.getElementById('submitBtn').onclick = openModal;
+}
+function openModal(){
+  const modal = el('section', {className: 'slds-modal slds-fade-in-open'},
+    '<div class="slds-modal__container"><div class="slds-modal__content">Submit attendance for this class?</div>'
+    + '<footer class="slds-modal__footer"><button class="slds-button slds-button_neutral">Cancel</button>'
+    + '<button class="slds-button slds-button_brand">Confirm Submission</button></footer></div>');
+  document.body.appendChild(modal);
+  const [cancel, confirm] = modal.querySelectorAll('button');
+  cancel.onclick = () => modal.remove();
+  confirm.onclick = () => {
+    const rows = {};
+    for (const tr of document.querySelectorAll('#tabBody tr')) {
+      rows[tr.querySelector('lightning-base-formatted-text').textContent] = tr.querySelector('input').checked;
+    }
+    later(S.delays.submit_delay, () => {
+      fetch('/mock/submit/' + S.record, {method: 'POST', body: JSON.stringify(rows)}).then(() => {
+        modal.remove();
+        const toast = el('div', {className: 'slds-notify_toast'}, 'Attendance submitted successfully');
+        document.body.appendChild(toast);
+        setTimeout(() => toast.remove(), 4000);
+      });
+    });
+  };
+}
+
+if (S.missing) app.textContent = 'Record not found';
+else if (S.record) later(S.delays.render_delay, renderRecord);
+else if (location.pathname.startsWith('/lightning/o/Event')) later(S.delays.render_delay, renderCalendar);
+else app.innerHTML = '<h1>Home</h1>';
+document.querySelector('nav a[title="Calendar"]').onclick = ev => {
+  ev.preventDefault();
+  history.pushState({}, '', '/lightning/o/Event/home');
+  later(S.delays.render_delay, renderCalendar);
+};
+</script>
+</body></html>
+"""
@@ -0,0 +1,167 @@
+"""
+Offline benchmark: run maa.py's full flow headless against the local mock portal.
+
+    python bench/run_bench.py                       # 1 course × 5 dates, defaults
+    python bench/run_bench.py --roster 200 --courses 3 --runs 3 --error-rate 0.2
+    python bench/run_bench.py --tile-delay 1.5 --json bench_results.json
+
+Each run starts a fresh headless Chrome on a throwaway profile, lands on the
+mock Home page and marks every (course, date) job through the Calendar (or
+cached record links with --warm-cache). Reported: wall time per run, the
+per-phase latency / WebDriver round-trip breakdown from maa's trace spans
+(p50/p95 across runs), and whether the portal saved exactly the Excel
+absentees.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import maa  # noqa: E402
+from mock_portal import DEFAULTS, MockPortal, SECTION, SEMESTER, bench_dates, course_code, reg_no  # noqa: E402
+
+def write_workbook(path, course, dates, roster, absent_rate, rng):
+    """Register in the layout maa.load_workbook expects; returns {date: [absent reg nos]}."""
+    wb = Workbook()
+    setup = wb.active
+    setup.title = "Initial Setup"
+    for row in (("Course Name", "Mock Lab"), ("Course Code", course_code(course)),
+                ("Semester", SEMESTER), ("Section", SECTION)):
+        setup.append(row)
+    att = wb.create_sheet("Attendance")
+    att.append([f"{course_code(course)} attendance register"])
+    att.append(["Sl. No.", "Reg. No.", "Name of the Student"] + [datetime(d.year, d.month, d.day) for d in dates])
+    absent = {d: [] for d in dates}
+    for n in range(1, roster + 1):
+        marks = []
+        for d in dates:
+            if rng.random() < absent_rate:
+                marks.append("ab")
+                absent[d].append(reg_no(course, n))
+            else:
+                marks.append("p")
+        att.append([n, int(reg_no(course, n)), f"Student {course}-{n:03d}"] + marks)
+    wb.save(path)
+    return absent
+
+def check_saved(portal, expected):
+    """Count jobs whose saved portal state has exactly the Excel absentees unticked."""
+    ok = 0
+    for (course, d), absentees in expected.items():
+        saved = portal.saved.get(portal.event_for(course, d))
+        if saved is not None and sorted(r for r, checked in saved.items() if not checked) == sorted(absentees):
+            ok += 1
+    return ok
+
+def run_once(portal, plan, workdir, warm_cache):
+    """One full session: fresh browser → Home → every date group. Returns (seconds, results)."""
+    if not warm_cache:
+        maa._event_cache = None
+        if os.path.exists(maa.EVENT_CACHE_FILE):
+            os.remove(maa.EVENT_CACHE_FILE)
+    profile = tempfile.mkdtemp(prefix="slcm_bench_", dir=workdir)
+    by_date = {}
+    for wb in plan:
+        for d, col in wb["jobs"]:
+            by_date.setdefault(d, []).append((wb, col))
+    results, driver = [], None
+    t0 = time.perf_counter()
+    try:
+        with maa.span("bench_run"):
+            driver = maa.start_driver(profile, fast=True)
+            driver = maa.bootstrap_session(driver, interactive=False)
+            for d in sorted(by_date):
+                results.extend(maa.run_date_group(driver, d, by_date[d]))
+    finally:
+        if driver:
+            driver.quit()
+        shutil.rmtree(profile, ignore_errors=True)
+    return time.perf_counter() - t0, results
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark maa.py against a local mock SLCM portal.")
+    ap.add_argument("--runs", type=int, default=1, help="Full sessions to run (default: 1)")
+    ap.add_argument("--dates", type=int, default=5, help="Class dates per course (default: 5)")
+    ap.add_argument("--absent-rate", type=float, default=0.1, help="Share of 'ab' cells (default: 0.1)")
+    ap.add_argument("--warm-cache", action="store_true", help="Keep the event cache between runs")
+    ap.add_argument("--profile-commands", action="store_true", help="Also print maa's WebDriver command profile")
+    ap.add_argument("--json", metavar="FILE", help="Write run times, phase spans and portal stats as JSON")
+    ap.add_argument("--keep", action="store_true", help="Keep the temporary work dir (workbooks, traces)")
+    for key, default in DEFAULTS.items():
+        flag = "--" + key.replace("_", "-")
+        if isinstance(default, bool):
+            ap.add_argument(flag, type=lambda s: s.lower() in ("1", "true", "yes", "on"), default=default,
+                            metavar="BOOL", help=f"mock portal '{key}' (default: {default})")
+        else:
+            ap.add_argument(flag, type=type(default), default=default, help=f"mock portal '{key}' (default: {default})")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {k: getattr(args, k) for k in DEFAULTS}
+    dates = bench_dates(count=args.dates)
+    workdir = tempfile.mkdtemp(prefix="slcm_bench_")
+
+    # Point maa's state at the work dir so a benchmark never touches real caches
+    maa.EVENT_CACHE_FILE = os.path.join(workdir, "event_cache.json")
+    maa.EXCEL_CACHE_DIR = os.path.join(workdir, "excel_cache")
+    maa.TRACE_DIR = os.path.join(workdir, "traces")
+    maa.JOURNAL_FILE = os.path.join(workdir, "journal.jsonl")
+    maa.CONFIG_FILE = os.path.join(workdir, "attendance_config.json")  # recovery_stats land here
+    maa.PROFILE_COMMANDS = args.profile_commands
+    maa.start_trace()
+
+    rng = random.Random(config["seed"])
+    expected, paths = {}, []
+    for c in range(config["courses"]):
+        path = os.path.join(workdir, f"{course_code(c)}.xlsx")
+        for d, absentees in write_workbook(path, c, dates, config["roster"], args.absent_rate, rng).items():
+            expected[(c, d)] = absentees
+        paths.append(path)
+    plan = [maa.plan_workbook(p, [f"{d:%d/%m/%Y}" for d in dates], False) for p in paths]
+
+    report = {"config": config, "dates": [d.isoformat() for d in dates], "runs": []}
+    try:
+        with MockPortal(dates, **config) as portal:
+            maa.HOME_URL = portal.base_url + "/lightning/page/home"
+            maa.BASE_URL = portal.base_url
+            print(f"🧪 Mock portal at {portal.base_url} — {len(expected)} job(s) per run")
+            for n in range(1, args.runs + 1):
+                portal.reset()
+                seconds, results = run_once(portal, plan, workdir, args.warm_cache)
+                submitted = sum(1 for _, _, r in results if maa.job_ok(r))
+                run = {"run": n, "seconds": round(seconds, 2), "jobs": len(results), "submitted": submitted,
+                       "saved_correctly": check_saved(portal, expected), **portal.stats}
+                report["runs"].append(run)
+                print(f"\n🏁 Run {n}: {seconds:.1f}s, {submitted}/{len(results)} submitted, "
+                      f"{run['saved_correctly']}/{len(expected)} saved correctly, "
+                      f"{run['errors_injected']} injected error(s), {run['pages']} page load(s)")
+
+        maa.print_latency_breakdown(maa._trace["spans"], title="⏱️ Per-phase latency across runs")
+        if args.profile_commands:
+            maa.print_command_profile()
+        times = [r["seconds"] for r in report["runs"]]
+        print(f"\n⏱️ Wall time per run: p50 {maa._percentile(times, 50):.1f}s, "
+              f"p95 {maa._percentile(times, 95):.1f}s over {len(times)} run(s)")
+        if args.json:
+            report["spans"] = maa._trace["spans"]
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Saved benchmark results to {args.json}")
+    finally:
+        if args.keep:
+            print(f"📁 Work dir kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0 if all(r["saved_correctly"] == len(expected) for r in report["runs"]) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
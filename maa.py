@@ -8,23 +8,58 @@ import json
 import tempfile
 import shutil
 import re
-import pandas as pd
-from datetime import datetime, date
+import math
+import socket
+import subprocess
+import argparse
+import asyncio
+import contextlib
+import functools
+import hashlib
+import importlib
+import zipfile
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
 from pathlib import Path
+from xml.etree import ElementTree
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import (
-    StaleElementReferenceException,
-    TimeoutException,
-    SessionNotCreatedException,
-)
+class _Lazy:
+    """
+    A module (or one of its attributes) imported on first use. Keeps
+    `import maa`, --dry-run and the other browser-free commands from paying for
+    pandas/numpy/openpyxl/selenium at startup.
+    """
+    def __init__(self, module, attr=None):
+        self._module, self._attr, self._obj = module, attr, None
+
+    def _load(self):
+        if self._obj is None:
+            obj = importlib.import_module(self._module)
+            self._obj = getattr(obj, self._attr) if self._attr else obj
+        return self._obj
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+np = _Lazy("numpy")
+pd = _Lazy("pandas")
+open_xlsx = _Lazy("openpyxl", "load_workbook")
+
+webdriver = _Lazy("selenium.webdriver")
+Service = _Lazy("selenium.webdriver.chrome.service", "Service")
+ChromeDriverManager = _Lazy("webdriver_manager.chrome", "ChromeDriverManager")
+By = _Lazy("selenium.webdriver.common.by", "By")
+WebDriverWait = _Lazy("selenium.webdriver.support.ui", "WebDriverWait")
+EC = _Lazy("selenium.webdriver.support.expected_conditions")
+Keys = _Lazy("selenium.webdriver.common.keys", "Keys")
+# Exception classes must be real classes in `except` clauses, so the functions
+# that catch them import them locally from selenium.common.exceptions.
 
 # =============================
 # Excel path resolver (UI picker + persisted config)
@@ -32,25 +67,47 @@ from selenium.common.exceptions import (
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) if "__file__" in globals() else os.getcwd()
 CONFIG_FILE = os.path.join(BASE_DIR, "attendance_config.json")
 
-def load_saved_excel_path():
+def load_config() -> dict:
     try:
         if os.path.exists(CONFIG_FILE):
             with open(CONFIG_FILE, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                p = data.get("excel_path")
-                if p and os.path.exists(p):
-                    return p
+                return data if isinstance(data, dict) else {}
     except Exception:
         pass
+    return {}
+
+_config_lock = threading.Lock()
+
+def update_config(**values) -> bool:
+    """
+    Merge values into attendance_config.json, keeping the other keys. Written
+    to a temp file and swapped in, so a crash never leaves a half-written config.
+    """
+    with _config_lock:
+        data = load_config()
+        data.update(values)
+        tmp = f"{CONFIG_FILE}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, CONFIG_FILE)
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not save config: {e}")
+            try: os.remove(tmp)
+            except OSError: pass
+            return False
+
+def load_saved_excel_path():
+    p = load_config().get("excel_path")
+    if p and os.path.exists(p):
+        return p
     return None
 
 def save_excel_path(path):
-    try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump({"excel_path": path}, f, ensure_ascii=False, indent=2)
+    if update_config(excel_path=path):
         print(f"💾 Saved Excel path to {CONFIG_FILE}")
-    except Exception as e:
-        print(f"⚠️ Could not save config: {e}")
 
 def pick_excel_via_ui():
     try:
@@ -72,8 +129,9 @@ def pick_excel_via_ui():
                 continue
             # quick validation: required sheets
             try:
-                xl = pd.ExcelFile(path)
-                sheets = set(xl.sheet_names)
+                wb = open_xlsx(path, read_only=True)
+                sheets = set(wb.sheetnames)
+                wb.close()
                 needed = {"Attendance", "Initial Setup"}
                 if not needed.issubset(sheets):
                     messagebox.showerror(
@@ -112,10 +170,6 @@ def resolve_excel_path(default_name="./attendance.xlsx"):
     save_excel_path(picked)
     return picked
 
-# ------ Resolve and use the path ------
-file_path = resolve_excel_path("./attendance.xlsx")
-print(f"🗂️  Excel file: {file_path}")
-
 # =============================
 # Config
 # =============================
@@ -123,6 +177,386 @@ HOME_URL  = "https://maheslcmtech.lightning.force.com/lightning/page/home"
 BASE_URL  = "https://maheslcmtech.lightning.force.com"
 LOGIN_URL = "https://maheslcm.manipal.edu/login"
 
+# =============================
+# Tracing: timed spans per phase → JSONL trace per run + latency breakdown
+# =============================
+TRACE_DIR = os.path.join(BASE_DIR, "traces")
+TRACE_ENABLED = True
+_trace = {"run_id": None, "path": None, "spans": []}
+_trace_lock = threading.Lock()
+_trace_local = threading.local()  # per thread: span stack + WebDriver round-trip counter
+
+def _round_trips() -> int:
+    return getattr(_trace_local, "round_trips", 0)
+
+# --profile-commands: time every WebDriver command by type and by the maa.py function that issued it
+PROFILE_COMMANDS = False
+_cmd_stats = {}  # (command, call_site) -> [count, total_ms, max_ms]
+_PROFILER_SKIP = {"execute", "inner", "span", "__exit__", "__enter__", "<lambda>", "<listcomp>", "<genexpr>"}
+
+def _call_site() -> str:
+    """Nearest maa.py function on the stack, skipping wrappers and WebDriverWait lambdas."""
+    f = sys._getframe(2)
+    while f is not None:
+        code = f.f_code
+        if code.co_filename == __file__ and code.co_name not in _PROFILER_SKIP:
+            return code.co_name
+        f = f.f_back
+    return "?"
+
+def _record_command(command, site, ms):
+    with _trace_lock:
+        st = _cmd_stats.setdefault((command, site), [0, 0.0, 0.0])
+        st[0] += 1
+        st[1] += ms
+        st[2] = max(st[2], ms)
+
+def instrument_driver(driver):
+    """Count every WebDriver command (one HTTP round trip) issued by this thread."""
+    if getattr(driver, "_maa_instrumented", False):
+        return driver
+    orig = driver.execute
+
+    def execute(driver_command, params=None):
+        _trace_local.round_trips = _round_trips() + 1
+        if not PROFILE_COMMANDS:
+            return orig(driver_command, params)
+        site, t0 = _call_site(), time.perf_counter()
+        try:
+            return orig(driver_command, params)
+        finally:
+            _record_command(driver_command, site, (time.perf_counter() - t0) * 1000)
+
+    driver.execute = execute
+    driver._maa_instrumented = True
+    return driver
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """
+    Time a phase. Nested spans record their parent; round_trips counts the
+    WebDriver commands made inside the span (including nested ones).
+    """
+    stack = _trace_local.__dict__.setdefault("stack", [])
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    rt0, t0, started = _round_trips(), time.perf_counter(), time.time()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        stack.pop()
+        record = {
+            "run": _trace["run_id"], "span": name, "parent": parent, "thread": threading.current_thread().name,
+            "start": round(started, 3), "ms": round((time.perf_counter() - t0) * 1000, 1),
+            "round_trips": _round_trips() - rt0,
+        }
+        if attrs:
+            record["attrs"] = {k: (v if isinstance(v, (str, int, float, bool, type(None))) else str(v))
+                               for k, v in attrs.items()}
+        if error:
+            record["error"] = error
+        _emit_span(record)
+
+def traced(name=None):
+    """Decorator form of span(); the span is named after the function by default."""
+    def wrap(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def _emit_span(record):
+    if not TRACE_ENABLED:
+        return
+    with _trace_lock:
+        _trace["spans"].append(record)
+        if _trace["path"]:
+            try:
+                with open(_trace["path"], "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except Exception:
+                _trace["path"] = None  # stop trying; keep the in-memory breakdown
+
+def start_trace():
+    _trace["run_id"] = datetime.now().strftime("%Y%m%d-%H%M%S")
+    _trace["spans"] = []
+    if not TRACE_ENABLED:
+        return
+    try:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        _trace["path"] = os.path.join(TRACE_DIR, f"run-{_trace['run_id']}.jsonl")
+    except Exception as e:
+        print(f"⚠️ Could not create trace dir: {e}")
+
+def _percentile(values, q):
+    vals = sorted(values)
+    if not vals:
+        return 0.0
+    k = max(0, min(len(vals) - 1, math.ceil(q / 100 * len(vals)) - 1))  # nearest rank
+    return vals[k]
+
+def print_latency_breakdown(spans, title="⏱️ Latency breakdown (this run)"):
+    by_name = {}
+    for r in spans:
+        by_name.setdefault(r["span"], []).append(r)
+    if not by_name:
+        return
+    print(f"\n{title}")
+    print(f"   {'phase':<32}{'n':>5}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'trips':>8}")
+    for name, rows in sorted(by_name.items(), key=lambda kv: -sum(r["ms"] for r in kv[1])):
+        ms = [r["ms"] for r in rows]
+        print(f"   {name:<32}{len(rows):>5}{sum(ms) / 1000:>10.1f}{_percentile(ms, 50):>10.0f}"
+              f"{_percentile(ms, 95):>10.0f}{sum(r.get('round_trips', 0) for r in rows):>8}")
+
+def print_command_profile(top=15):
+    """Ranked WebDriver command report: by command type, by call site, and the chattiest pairs."""
+    with _trace_lock:
+        stats = dict(_cmd_stats)
+    if not stats:
+        return
+    total_n = sum(v[0] for v in stats.values())
+    total_ms = sum(v[1] for v in stats.values())
+    print(f"\n📡 WebDriver commands: {total_n} round trips, {total_ms / 1000:.1f}s")
+
+    def table(title, groups):
+        print(f"   {title:<48}{'calls':>7}{'total s':>9}{'avg ms':>8}{'max ms':>8}{'share':>7}")
+        for key, (n, ms, mx) in sorted(groups.items(), key=lambda kv: -kv[1][1])[:top]:
+            print(f"   {key[:47]:<48}{n:>7}{ms / 1000:>9.2f}{ms / n:>8.0f}{mx:>8.0f}{ms / (total_ms or 1):>7.0%}")
+
+    def group(key_fn):
+        out = {}
+        for k, (n, ms, mx) in stats.items():
+            g = out.setdefault(key_fn(k), [0, 0.0, 0.0])
+            g[0] += n
+            g[1] += ms
+            g[2] = max(g[2], mx)
+        return out
+
+    table("by command", group(lambda k: k[0]))
+    print()
+    table("by call site", group(lambda k: k[1]))
+    print()
+    table("call site → command", group(lambda k: f"{k[1]} → {k[0]}"))
+
+def finish_trace():
+    if not TRACE_ENABLED:
+        return
+    print_latency_breakdown(_trace["spans"])
+    if _trace["path"]:
+        print(f"🧾 Trace written to {_trace['path']}")
+
+def trace_report(folder=None):
+    """p50/p95 per phase across every JSONL trace in `folder`."""
+    folder = folder or TRACE_DIR
+    spans, runs = [], 0
+    for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+        if not name.endswith(".jsonl"):
+            continue
+        runs += 1
+        with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+    if not spans:
+        print(f"ℹ️ No traces found in {folder}")
+        return 1
+    print_latency_breakdown(spans, title=f"⏱️ Latency breakdown across {runs} run(s) in {folder}")
+    return 0
+
+# =============================
+# Waits: resolve as soon as the page is ready instead of fixed sleeps
+# =============================
+# Per-step upper bounds in seconds; override with --timeout STEP=SECONDS
+WAIT_TIMEOUTS = {
+    "nav": 10,             # hard_nav: document + Lightning spinners settled
+    "calendar": 15,        # mini calendar rendered
+    "scroll": 2,           # day-panel scroll step painted
+    "day_panel": 20,       # day heading found and scrolled to
+    "panel_links": 3,      # day panel's subject links rendered (empty days resolve here)
+    "record": 15,          # cached event record page shows its Attendance tab
+    "attendance_tab": 10,  # Attendance tab content (or the Lightning error) rendered
+    "table": 10,           # attendance table rows rendered
+    "reload": 25,          # page refresh after a Lightning error
+    "submit_button": 20,   # 'Submit Attendance' button enabled
+    "modal": 22,           # confirmation modal + its confirm button visible
+    "landed": 15,          # success toast / modal closed after confirming
+    "finish": 5,           # post-submit settle before the driver quits
+}
+
+# Lightning's "This page has an error" banner: the usual error containers are
+# cheap enough for every check; the whole-document fallback is a native XPath
+# text-node search (nothing is serialised) and only runs when `deep` is set.
+LIGHTNING_ERROR_JS = """
+const ERR = 'This page has an error. You might just need to refresh';
+function lightningError(deep){
+  for (const n of document.querySelectorAll(
+      '.slds-text-color_error, [role=alert], .forceErrorBanner, .genericError, .uiMessage, .errorMessage')) {
+    if ((n.textContent || '').includes(ERR)) return true;
+  }
+  return !!deep && !!document.evaluate('//text()[contains(., "' + ERR + '")]', document, null,
+                                        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+"""
+
+# Named in-page conditions (no eval, so Lightning's CSP does not matter).
+# Resolved by a MutationObserver, re-checked on every DOM change.
+WAIT_DOM_JS = LIGHTNING_ERROR_JS + """
+const name = arguments[0], arg = arguments[1], timeoutMs = arguments[2];
+const done = arguments[arguments.length - 1];
+function visible(el){
+  if (!el) return false;
+  const r = el.getBoundingClientRect();
+  return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+}
+function spinning(){
+  return Array.from(document.querySelectorAll('.slds-spinner_container, lightning-spinner, .slds-spinner'))
+              .some(visible);
+}
+// A rendered attendance row: a table row holding both a checkbox and a Reg. No. cell
+function attendanceRow(){
+  for (const c of document.querySelectorAll('tr lightning-base-formatted-text')) {
+    if (c.closest('tr').querySelector("input[type='checkbox']")) return true;
+  }
+  return false;
+}
+let pollTick = false;  // set while check() runs from the 150 ms poll rather than a mutation
+const conds = {
+  idle: () => document.readyState === 'complete' && !spinning(),
+  visible: () => Array.from(document.querySelectorAll(arg)).some(visible),
+  present: () => !!document.querySelector(arg),
+  rows: () => attendanceRow() ? 'ok' : false,
+  record: () => {
+    if (!location.pathname.includes('/lightning/r/')) return 'gone';
+    if (document.querySelector("a[data-label='Attendance']")) return 'ok';
+    const t = Array.from(document.querySelectorAll('span.title'))
+                   .some(s => (s.textContent || '').trim() === 'Attendance');
+    return t ? 'ok' : false;
+  },
+  // --- submission pipeline (these click when their target appears) ---
+  submit_click: () => {
+    const b = Array.from(document.querySelectorAll('button'))
+                   .find(x => (x.textContent || '').includes('Submit Attendance') && visible(x) && !x.disabled);
+    if (!b) return false;
+    b.scrollIntoView({block: 'center'});
+    b.click();
+    return 'clicked';
+  },
+  confirm_click: () => {
+    const modal = Array.from(document.querySelectorAll('.modal-container, .uiModal, .slds-modal')).find(visible);
+    if (!modal) return false;
+    const norm = t => (t || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    const btns = Array.from(modal.querySelectorAll('button, .slds-button')).filter(b => visible(b) && !b.disabled);
+    const brand = b => b.classList.contains('slds-button_brand');
+    // candidates in priority order, all checked in this one pass
+    const picks = [
+      ['exact', b => norm(b.innerText || b.textContent) === 'confirm submission'],
+      ['contains', b => norm(b.innerText || b.textContent).includes('confirm submission')],
+      ['footer brand', b => brand(b) && !!b.closest('footer, .slds-modal__footer')
+                            && norm(b.textContent).includes('confirm')],
+      ['brand', b => brand(b) && norm(b.textContent).includes('confirm')],
+      ['confirm', b => norm(b.innerText || b.textContent) === 'confirm'],
+    ];
+    for (const [label, test] of picks) {
+      const b = btns.find(test);
+      if (b) { b.click(); return label; }
+    }
+    return false;
+  },
+  submitted: () => {
+    const toast = Array.from(document.querySelectorAll('.slds-notify_toast, .forceToastMessage, .toastMessage'))
+                       .find(visible);
+    if (toast) {
+      const t = (toast.innerText || toast.textContent || '').trim();
+      return (/error|fail|could not|unable/i.test(t) ? 'error: ' : 'toast: ') + t;
+    }
+    const modalOpen = Array.from(document.querySelectorAll('.modal-container, .uiModal, .slds-modal')).some(visible);
+    return !modalOpen && document.readyState === 'complete' && !spinning() ? 'closed' : false;
+  },
+  attendance: () => {
+    if (lightningError(pollTick)) return 'error';
+    return attendanceRow() ? 'table' : false;
+  },
+};
+const cond = conds[name];
+let finished = false, obs = null, timer = null;
+function finish(v){
+  if (finished) return;
+  finished = true;
+  if (obs) obs.disconnect();
+  clearTimeout(timer);
+  done(v);
+}
+function check(){ try { const v = cond(); if (v) finish(v); } catch(e){} }
+check();
+if (finished) return;
+obs = new MutationObserver(check);
+obs.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+// readyState and spinner fade-outs do not always mutate the DOM
+const poll = setInterval(() => {
+  if (finished) { clearInterval(poll); return; }
+  pollTick = true;
+  try { check(); } finally { pollTick = false; }
+}, 150);
+timer = setTimeout(() => { clearInterval(poll); finish(false); }, timeoutMs);
+"""
+
+WAIT_FRAMES_JS = """
+const done = arguments[arguments.length - 1];
+requestAnimationFrame(() => requestAnimationFrame(() => done(true)));
+"""
+
+def _ensure_script_timeout(driver, seconds):
+    need = seconds + 5
+    if getattr(driver, "_maa_script_timeout", 0) < need:
+        driver.set_script_timeout(need)
+        driver._maa_script_timeout = need
+
+def wait_dom(driver, cond, arg=None, step=None, timeout=None):
+    """
+    Block until the named in-page condition holds (see WAIT_DOM_JS) or the
+    step's timeout passes. Returns the condition's value, or False on timeout.
+    """
+    if timeout is None:
+        timeout = WAIT_TIMEOUTS.get(step, 10)
+    try:
+        _ensure_script_timeout(driver, timeout)
+        return driver.execute_async_script(WAIT_DOM_JS, cond, arg, int(timeout * 1000)) or False
+    except Exception:
+        return False
+
+def wait_idle(driver, step="nav", timeout=None) -> bool:
+    """document.readyState complete and no visible Lightning spinner."""
+    return bool(wait_dom(driver, "idle", step=step, timeout=timeout))
+
+def wait_frames(driver):
+    """Wait for two animation frames, i.e. until a scroll/layout change is painted."""
+    try:
+        _ensure_script_timeout(driver, WAIT_TIMEOUTS["scroll"])
+        driver.execute_async_script(WAIT_FRAMES_JS)
+    except Exception:
+        pass
+
+def set_wait_timeouts(specs):
+    """Apply ['step=seconds', ...] overrides from the command line."""
+    for spec in specs or []:
+        step, _, secs = spec.partition("=")
+        if step not in WAIT_TIMEOUTS:
+            raise SystemExit(f"❌ Unknown wait step '{step}'. Known: {', '.join(WAIT_TIMEOUTS)}")
+        try:
+            WAIT_TIMEOUTS[step] = float(secs)
+        except ValueError:
+            raise SystemExit(f"❌ Invalid timeout for '{step}': {secs!r}")
+
 # =============================
 # Helpers
 # =============================
@@ -147,89 +581,122 @@ def close_blank_tabs(driver):
     if driver.window_handles:
         driver.switch_to.window(driver.window_handles[-1])
 
+@traced()
 def hard_nav(driver, url, attempts=4):
     for _ in range(attempts):
         try:
-            driver.get(url); time.sleep(0.5)
+            driver.get(url); wait_idle(driver)
             if ready(driver) and driver.current_url.startswith("http"):
                 return True
         except Exception:
             pass
         try:
-            driver.execute_script("window.location.href = arguments[0];", url); time.sleep(0.5)
+            driver.execute_script("window.location.href = arguments[0];", url); wait_idle(driver)
             if ready(driver) and driver.current_url.startswith("http"):
                 return True
         except Exception:
             pass
         try:
             driver.switch_to.new_window('tab')
-            driver.get(url); time.sleep(0.7)
+            driver.get(url); wait_idle(driver)
             if ready(driver) and driver.current_url.startswith("http"):
                 close_blank_tabs(driver)
                 return True
         except Exception:
             pass
-        time.sleep(0.3)
     close_blank_tabs(driver)
     return False
 
 def _norm(s: str) -> str:
     return " ".join((s or "").split())
 
-def matches_event_text(txt: str, code: str, sem: str, sec: str, sess_ignored: str | None) -> bool:
+@functools.lru_cache(maxsize=64)
+def compile_event_matcher(code: str, sem: str, sec: str):
     """
+    Build the tile matcher for one course once. The returned function takes a
+    tile's text and returns the list of reasons it does not match (empty = match).
     - Section can be 'B' or 'B-1'.
     - If section is a single letter (e.g., 'B'), DO NOT match 'B-1', 'B-2', etc.
       Only accept 'Sec B', 'Section B', etc.
+    - Semester must be a whole token ('Semester V' does not match 'Semester VI').
     - Session is ignored by design.
     """
-    T = _norm(txt).upper()
-    reasons = []   # collect why it fails
-
-    ok = True
-
-    if code:
-        if code.upper() not in T:
-            reasons.append(f"Course code '{code}' not in '{T}'")
-            ok = False
-
-    if sem:
-        if f"SEMESTER {sem.upper()}" not in T:
-            reasons.append(f"Semester '{sem}' not in '{T}'")
-            ok = False
-
-    if sec:
-        secU = sec.upper().strip()
-        if "-" in secU:
+    code_u = (code or "").upper()
+    sem_re = re.compile(rf"\bSEMESTER {re.escape(sem.upper())}\b") if sem else None
+    sec_re, sec_u = None, (sec or "").upper().strip()
+    if sec_u:
+        if "-" in sec_u:
             # Exact like B-1 → require exact match as a whole word
-            if not re.search(rf"\b{re.escape(secU)}\b", T):
-                reasons.append(f"Section '{secU}' not in '{T}'")
-                ok = False
+            sec_re = re.compile(rf"\b{re.escape(sec_u)}\b")
         else:
             # Only match explicit section tokens: SEC B / SECTION B
-            patt = rf"\bSEC(?:TION)?\.?\s*[:\-]?\s*{re.escape(secU)}\b(?!-)"
-            if not re.search(patt, T):
-                reasons.append(f"Section '{secU}' not matched explicitly in '{T}'")
-                ok = False
+            sec_re = re.compile(rf"\bSEC(?:TION)?\.?\s*[:\-]?\s*{re.escape(sec_u)}\b(?!-)")
 
-    if not ok:
+    def mismatches(txt: str) -> list:
+        T = _norm(txt).upper()
+        reasons = []   # collect why it fails
+        if code_u and code_u not in T:
+            reasons.append(f"Course code '{code}' not in '{T}'")
+        if sem_re and not sem_re.search(T):
+            reasons.append(f"Semester '{sem}' not in '{T}'")
+        if sec_re and not sec_re.search(T):
+            if "-" in sec_u:
+                reasons.append(f"Section '{sec_u}' not in '{T}'")
+            else:
+                reasons.append(f"Section '{sec_u}' not matched explicitly in '{T}'")
+        return reasons
+
+    return mismatches
+
+def matches_event_text(txt: str, code: str, sem: str, sec: str, sess_ignored: str | None,
+                       verbose: bool = True) -> bool:
+    reasons = compile_event_matcher(code or "", sem or "", sec or "")(txt)
+    if reasons and verbose:
         print(f"❌ Event text mismatch: {txt}  →  {', '.join(reasons)}")
+    return not reasons
+
+def _is_record_href(href: str) -> bool:
+    return "lightning/r/" in (href or "")
+
+def rank_event_tiles(tiles, code, sem, sec, diagnostics=None):
+    """
+    Matching tiles, best first: tiles linking to a /lightning/r/ record page win,
+    then page order. Non-matching tiles go to `diagnostics` as (text, reasons).
+    """
+    matcher = compile_event_matcher(code or "", sem or "", sec or "")
+    ranked = []
+    for t in tiles:
+        txt = (t.get("text") or "").strip()
+        if not txt:
+            continue
+        reasons = matcher(txt)
+        if reasons:
+            if diagnostics is not None:
+                diagnostics.append((txt, reasons))
+            continue
+        ranked.append(t)
+    ranked.sort(key=lambda t: (not _is_record_href(t.get("href")), t.get("index", 0)))
+    return ranked
 
-    return ok
+SHOW_MATCH_DIAGNOSTICS = False  # --debug-match
 
+def print_match_diagnostics(diagnostics, force=False):
+    if not diagnostics or not (force or SHOW_MATCH_DIAGNOSTICS):
+        return
+    print(f"🔍 {len(diagnostics)} tile(s) did not match:")
+    for txt, reasons in diagnostics:
+        print(f"   ❌ {txt}  →  {', '.join(reasons)}")
+
+# --- Lightning page error detection ---
+# Checked in-page and only a boolean comes back (see LIGHTNING_ERROR_JS).
+ERROR_PROBE_JS = LIGHTNING_ERROR_JS + """
+return lightningError(true);
+"""
 
-# --- NEW: Lightning page error detection ---
 def has_salesforce_error(driver) -> bool:
-    """Detects the Lightning 'This page has an error...' message."""
+    """Detects the Lightning 'This page has an error...' message in one round trip."""
     try:
-        txt = driver.execute_script("return document.body ? document.body.innerText : ''") or ""
-        if "This page has an error. You might just need to refresh it" in txt:
-            return True
-        nodes = driver.find_elements(
-            By.XPATH,
-            "//*[contains(., 'This page has an error. You might just need to refresh')]"
-        )
-        return len(nodes) > 0
+        return bool(driver.execute_script(ERROR_PROBE_JS))
     except Exception:
         return False
 
@@ -272,6 +739,7 @@ def enable_auto_scroll(driver):
     })();
     """)
 
+@traced()
 def scroll_to_day_panel(driver, target_date, timeout=40):
     labels = _day_heading_variants(target_date)
     container = WebDriverWait(driver, 20).until(
@@ -307,7 +775,7 @@ def scroll_to_day_panel(driver, target_date, timeout=40):
             if tgt < cur:
                 tgt = cur   # enforce DOWN-ONLY
             driver.execute_script("arguments[0].scrollTop = arguments[1];", container, tgt)
-            time.sleep(0.25)
+            wait_frames(driver)
             cur2 = driver.execute_script("return arguments[0].scrollTop;", container)
             if abs(cur2 - tgt) <= step:
                 return True
@@ -315,12 +783,12 @@ def scroll_to_day_panel(driver, target_date, timeout=40):
         # keep scrolling down
         next_top = min(max_top, max(cur, last_top) + step)
         driver.execute_script("arguments[0].scrollTop = arguments[1];", container, next_top)
-        time.sleep(0.25)
+        wait_frames(driver)
         new_top = driver.execute_script("return arguments[0].scrollTop;", container)
 
         if new_top < last_top:
             driver.execute_script("arguments[0].scrollTop = arguments[1];", container, last_top + step)
-            time.sleep(0.2)
+            wait_frames(driver)
             new_top = driver.execute_script("return arguments[0].scrollTop;", container)
             step = min(step + 100, 1400)
 
@@ -329,6 +797,76 @@ def scroll_to_day_panel(driver, target_date, timeout=40):
             break
     return False
 
+# One round trip: find the day's heading (jumping a viewport at a time in-page
+# only while lazily rendered rows are missing), scroll straight to its panel
+# (down-only), then let a MutationObserver wait for the panel's subject links.
+LOCATE_DAY_PANEL_JS = """
+const labels = arguments[0], timeoutMs = arguments[1], settleMs = arguments[2];
+const done = arguments[arguments.length - 1];
+const LINKS = "a.subject-link, a[data-id='subject-link']";
+const t0 = performance.now();
+let finished = false, obs = null;
+function text(n){ return (n && (n.innerText || n.textContent) || '').trim(); }
+function topWithin(node, anc){ let y = 0, el = node; while (el && el !== anc){ y += el.offsetTop; el = el.offsetParent; } return y; }
+function tiles(panel){
+  return Array.from(panel.querySelectorAll(LINKS))
+              .map((a, i) => ({text: text(a), href: a.getAttribute('href') || '', index: i}));
+}
+function finish(res){
+  if (finished) return;
+  finished = true;
+  if (obs) obs.disconnect();
+  res.ms = Math.round(performance.now() - t0);
+  done(res);
+}
+function findPanel(cont){
+  for (const h of cont.querySelectorAll('h2.slds-assistive-text')) {
+    if (!labels.includes(text(h))) continue;
+    let sib = h.nextElementSibling;
+    while (sib && !sib.classList.contains('calendarDay')) sib = sib.nextElementSibling;
+    if (sib) return sib;
+  }
+  return null;
+}
+function step(){
+  if (finished) return;
+  const timedOut = performance.now() - t0 > timeoutMs;
+  const cont = document.querySelector('.calendarRow.slds-scrollable_y');
+  if (!cont) return timedOut ? finish({found: false, reason: 'no day list'}) : setTimeout(step, 50);
+  const panel = findPanel(cont);
+  const max = cont.scrollHeight - cont.clientHeight;
+  if (panel) {
+    const target = Math.min(max, Math.max(0, topWithin(panel, cont) - 80));
+    if (target > cont.scrollTop) cont.scrollTop = target;   // down-only
+    const result = () => ({found: true, panel: panel, tiles: tiles(panel)});
+    if (panel.querySelector(LINKS)) return finish(result());
+    obs = new MutationObserver(() => { if (panel.querySelector(LINKS)) finish(result()); });
+    obs.observe(panel, {childList: true, subtree: true});
+    setTimeout(() => finish(result()), settleMs);   // a day can have no classes at all
+    return;
+  }
+  if (timedOut || cont.scrollTop >= max - 2) return finish({found: false, reason: 'heading not found'});
+  cont.scrollTop = Math.min(max, cont.scrollTop + Math.max(220, Math.floor(cont.clientHeight * 0.9)));
+  setTimeout(step, 60);   // let lazily rendered days appear
+}
+step();
+"""
+
+@traced()
+def locate_day_panel(driver, target_date):
+    """
+    Find, scroll to and return the day's panel in a single execute_async_script.
+    Returns {"found", "panel" (WebElement), "tiles" [{text, href, index}], "ms"}.
+    """
+    timeout = WAIT_TIMEOUTS["day_panel"]
+    settle = WAIT_TIMEOUTS["panel_links"]
+    try:
+        _ensure_script_timeout(driver, timeout + settle)
+        return driver.execute_async_script(LOCATE_DAY_PANEL_JS, _day_heading_variants(target_date),
+                                           int(timeout * 1000), int(settle * 1000)) or {"found": False}
+    except Exception as e:
+        return {"found": False, "reason": str(e)}
+
 def get_day_panel_webelement(driver, target_date):
     labels = _day_heading_variants(target_date)
     container = WebDriverWait(driver, 15).until(
@@ -346,50 +884,54 @@ def get_day_panel_webelement(driver, target_date):
     """, container, labels)
     return panel  # WebElement or None
 
-def open_event_from_day_panel(driver, target_date, code, sem, sec, sess_ignored):
-    panel = get_day_panel_webelement(driver, target_date)
+PANEL_TILES_JS = """
+return Array.from(arguments[0].querySelectorAll("a.subject-link, a[data-id='subject-link']"))
+  .map((a, i) => ({text: (a.innerText || a.textContent || '').trim(), href: a.getAttribute('href') || '', index: i}));
+"""
+
+CLICK_PANEL_TILE_JS = """
+const a = arguments[0].querySelectorAll("a.subject-link, a[data-id='subject-link']")[arguments[1]];
+if (!a) return null;
+a.scrollIntoView({block: 'center'});
+a.click();
+return a.getAttribute('href') || '';
+"""
+
+@traced()
+def open_event_from_day_panel(driver, target_date, code, sem, sec, sess_ignored, panel=None, tiles=None):
+    """
+    Pick the best matching tile from the day panel and click it. Tiles come from
+    locate_day_panel() or one JSON read of the panel; the click is one call.
+    """
+    from selenium.common.exceptions import StaleElementReferenceException
+    panel = panel or get_day_panel_webelement(driver, target_date)
     if not panel:
         return False
 
-    try:
-        driver.execute_script("arguments[0].scrollIntoView({block:'start'});", panel)
-        time.sleep(0.2)
-    except Exception:
-        pass
-
-    links = panel.find_elements(By.CSS_SELECTOR, "a.subject-link, a[data-id='subject-link']")
-    if not links:
-        return False
-
-    best, best_href = None, None
-    for el in links:
+    if tiles is None:
         try:
-            txt = (el.text or el.get_attribute("innerText") or "").strip()
-            if not txt:
-                continue
-            if matches_event_text(txt, code, sem, sec, None):
-                href = el.get_attribute("href") or ""
-                if href.startswith("/lightning/r/") or "lightning/r/" in href:
-                    best, best_href = el, href
-                    break
-                if best is None:
-                    best, best_href = el, href
+            tiles = driver.execute_script(PANEL_TILES_JS, panel) or []
         except StaleElementReferenceException:
-            continue
+            panel = get_day_panel_webelement(driver, target_date)
+            tiles = driver.execute_script(PANEL_TILES_JS, panel) or [] if panel else []
+    if not tiles:
+        return False
 
-    if not best:
+    diagnostics = []
+    ranked = rank_event_tiles(tiles, code, sem, sec, diagnostics)
+    print_match_diagnostics(diagnostics, force=not ranked)
+    if not ranked:
         return False
+    best = ranked[0]
 
-    # Click the exact element we found in THIS day panel
+    # Click the exact tile we found in THIS day panel
     try:
-        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", best)
-        time.sleep(0.1)
-        driver.execute_script("arguments[0].click();", best)
-    except Exception:
-        try:
-            best.click()
-        except Exception:
-            return False
+        best_href = driver.execute_script(CLICK_PANEL_TILE_JS, panel, best["index"])
+    except StaleElementReferenceException:
+        best_href = None
+    if best_href is None:
+        return False
+    best_href = best_href or best.get("href") or ""
 
     if not best_href or best_href.strip() in ("", "javascript:void(0)", "#"):
         try:
@@ -427,221 +969,1099 @@ def aria_date_matches_selected(aria_desc: str, selected_date: date) -> bool:
         return False
 
 # =============================
-# 1) Parse date argument (d/m/Y) or use today's date
+# 1) Parse date arguments (d/m/Y, several dates, ranges) or use today's date
 # =============================
+DATE_FORMATS = ["%d/%m/%Y","%d-%m-%Y","%Y-%m-%d","%d-%b-%y","%d-%b-%Y",
+                "%A, %d %B %Y","%A, %d %B %Y at %I:%M:%S %p"]
+
 def parse_date_any(s: str) -> date:
     s = s.strip()
-    fmts = ["%d/%m/%Y","%d-%m-%Y","%Y-%m-%d","%d-%b-%y","%d-%b-%Y",
-            "%A, %d %B %Y","%A, %d %B %Y at %I:%M:%S %p"]
-    for f in fmts:
+    for f in DATE_FORMATS:
         try: return datetime.strptime(s, f).date()
         except Exception: pass
     return pd.to_datetime(s, dayfirst=True).date()
 
-if len(sys.argv) > 1:
-    selected_date = parse_date_any(sys.argv[1])
-    print(f"📅 Using date: {selected_date} (from argument)")
-else:
-    selected_date = datetime.today().date()
-    print(f"📅 Using date: {selected_date} (today)")
+def expand_date_args(tokens):
+    """
+    Turn CLI date tokens into a sorted, de-duplicated list of dates.
+    Each token is a single date or an inclusive range 'FROM..TO'.
+    """
+    out = set()
+    for tok in tokens:
+        if ".." in tok:
+            a, b = tok.split("..", 1)
+            start, end = parse_date_any(a), parse_date_any(b)
+            if end < start:
+                start, end = end, start
+            d = start
+            while d <= end:
+                out.add(d)
+                d += timedelta(days=1)
+        else:
+            out.add(parse_date_any(tok))
+    return sorted(out)
+
+def parse_cli(argv=None):
+    ap = argparse.ArgumentParser(description="Mark attendance in the MAHE SLCM portal from the Excel register.")
+    ap.add_argument("dates", nargs="*",
+                    help="Date(s) to mark, e.g. 23/08/2025, several dates, or a range 18/08/2025..22/08/2025 "
+                         "(default: today)")
+    ap.add_argument("--all-dates", action="store_true",
+                    help="Mark every date column in the Attendance sheet that has entries")
+    ap.add_argument("--workers", type=int, default=1, metavar="N",
+                    help="Run jobs on N parallel Chrome sessions (each on a copy of the logged-in profile)")
+    ap.add_argument("--async", dest="use_async", action="store_true",
+                    help="Async orchestrator: plan workbooks while --workers browsers mark, stream results")
+    ap.add_argument("--job-timeout", type=float, default=None, metavar="SECONDS",
+                    help=f"With --async: give up on a job after this long (default: {JOB_TIMEOUT_SECS})")
+    ap.add_argument("--results-json", metavar="FILE",
+                    help="Write per-job results as JSON")
+    ap.add_argument("--timeout", action="append", metavar="STEP=SECONDS",
+                    help=f"Override a wait step's upper bound (steps: {', '.join(WAIT_TIMEOUTS)}); repeatable")
+    ap.add_argument("--fast", action="store_true",
+                    help="Headless Chrome with images/fonts/media/telemetry blocked (switches to a visible "
+                         "window only if SSO login is needed)")
+    ap.add_argument("--measure-blocking", action="store_true",
+                    help="After login, print the Home page load time with and without request blocking")
+    ap.add_argument("--debug-match", action="store_true",
+                    help="List every calendar tile that did not match the course (printed anyway when none match)")
+    ap.add_argument("--no-excel-cache", action="store_true",
+                    help="Always parse the workbook instead of using the local parsed-workbook cache")
+    ap.add_argument("--no-event-cache", action="store_true",
+                    help="Always go through the Calendar instead of cached event record links")
+    ap.add_argument("--daemon", action="store_true",
+                    help="Keep one logged-in Chrome running; later runs attach to it instead of starting Chrome")
+    ap.add_argument("--port", type=int, default=9222,
+                    help="Remote-debugging port for --daemon (default: 9222)")
+    ap.add_argument("--stop-daemon", action="store_true", help="Ask a running daemon to shut down")
+    ap.add_argument("--no-daemon", action="store_true", help="Ignore a running daemon and start a fresh browser")
+    ap.add_argument("--profile-commands", action="store_true",
+                    help="Time every WebDriver command and print a ranked report by command and call site")
+    ap.add_argument("--diff-only", action="store_true",
+                    help="Compare the portal with Excel first: skip dates that already match, "
+                         "otherwise only toggle the rows that differ (re-ticking wrongly absent students)")
+    ap.add_argument("--no-journal", action="store_true",
+                    help="Don't read or write the checkpoint journal (slcm_journal.jsonl)")
+    ap.add_argument("--force", action="store_true",
+                    help="Redo jobs the journal already has as submitted")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="Read the workbook(s) and list the absentees per date without opening a browser")
+    ap.add_argument("--no-trace", action="store_true",
+                    help="Don't write a JSONL trace or print the latency breakdown")
+    ap.add_argument("--trace-report", nargs="?", const="", metavar="DIR",
+                    help="Print p50/p95 per phase across saved traces (default: ./traces) and exit")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--manifest", metavar="FILE",
+                     help="JSON/YAML list of workbooks to process in one session")
+    src.add_argument("--scan", metavar="FOLDER",
+                     help="Process every .xlsx in FOLDER that has 'Attendance' and 'Initial Setup' sheets")
+    return ap.parse_args(argv)
 
 # =============================
 # 2) Load Excel file + Initial Setup fields (Session IGNORED)
 # =============================
-try:
-    attendance_df = pd.read_excel(file_path, sheet_name="Attendance", header=1)
-    setup_df = pd.read_excel(file_path, sheet_name="Initial Setup", header=None)
-except FileNotFoundError:
-    print(f"❌ Excel file not found: {file_path}")
-    sys.exit(1)
-except Exception as e:
-    print(f"❌ Failed to read Excel: {e}")
-    sys.exit(1)
-
 def val_or_empty(x):
     s = str(x).strip()
     return "" if s.lower() in ("nan", "none", "null") else s
 
-# Extract values from Initial Setup (Column B values on rows 1..5)
-course_name   = val_or_empty(setup_df.iloc[0, 1]) if len(setup_df) > 0 else ""
-course_code   = val_or_empty(setup_df.iloc[1, 1]) if len(setup_df) > 1 else ""
-semester      = val_or_empty(setup_df.iloc[2, 1]) if len(setup_df) > 2 else ""
-class_section = val_or_empty(setup_df.iloc[3, 1]) if len(setup_df) > 3 else ""
-session_no    = ""  # IGNORED by requirement
-
-print("\n📘 Course Details from Initial Setup:")
-print(f"   Course Name   : {course_name or '(blank)'}")
-print(f"   Course Code   : {course_code or '(blank)'}")
-print(f"   Semester      : {semester or '(blank)'}")
-print(f"   Class Section : {class_section or '(blank)'}  ")
-
-
-# Validate required fields (session optional / ignored)
-missing = []
-if not course_code:   missing.append("Course Code (B2)")
-if not semester:      missing.append("Semester (B3)")
-if not class_section: missing.append("Class Section (B4)")
-if missing:
-    print("⚠️ Initial Setup is incomplete. Required fields missing:")
-    for m in missing:
-        print(f"   - {m}")
-    print("Please fill these in 'Initial Setup' sheet and re-run.")
-    sys.exit(1)
-
-def find_date_column(columns, target_date):
+ATTENDANCE_HEADER_ROW = 2  # row 1 is the sheet title
+
+@traced()
+def load_workbook(file_path, dates=None, sheets=("Initial Setup", "Attendance")):
+    """
+    Returns (attendance_df, setup) where setup holds the Initial Setup fields.
+
+    The workbook is opened once in read-only (streaming) mode. Only B1:B4 of
+    Initial Setup is read, and from Attendance only the Reg. No. column plus the
+    date columns for `dates` (all date columns when None) are kept. Sheets not
+    listed in `sheets` are skipped and come back as None. Raises ValueError
+    when the file cannot be opened or lacks either sheet.
+    """
+    attendance_df, setup = None, None
+    timings = {}
+    t0 = time.perf_counter()
+    try:
+        wb = open_xlsx(file_path, read_only=True, data_only=True)
+    except FileNotFoundError:
+        raise ValueError(f"Excel file not found: {file_path}") from None
+    except Exception as e:
+        raise ValueError(f"Failed to read Excel: {e}") from e
+    timings["open"] = time.perf_counter() - t0
+
+    try:
+        try:
+            setup_ws, att_ws = wb["Initial Setup"], wb["Attendance"]
+        except KeyError as e:
+            raise ValueError(f"Failed to read Excel: missing sheet {e}") from None
+
+        # Extract values from Initial Setup (Column B values on rows 1..4)
+        if "Initial Setup" in sheets:
+            t0 = time.perf_counter()
+            col_b = [r[0] for r in setup_ws.iter_rows(min_row=1, max_row=4, min_col=2, max_col=2, values_only=True)]
+            col_b += [None] * (4 - len(col_b))
+            setup = {
+                "course_name":   val_or_empty(col_b[0]) if col_b[0] is not None else "",
+                "course_code":   val_or_empty(col_b[1]) if col_b[1] is not None else "",
+                "semester":      val_or_empty(col_b[2]) if col_b[2] is not None else "",
+                "class_section": val_or_empty(col_b[3]) if col_b[3] is not None else "",
+            }
+            timings["setup"] = time.perf_counter() - t0
+        if "Attendance" not in sheets:
+            return None, setup
+
+        # Header row → Reg. No. column + the wanted date columns
+        t0 = time.perf_counter()
+        header = next(att_ws.iter_rows(min_row=ATTENDANCE_HEADER_ROW, max_row=ATTENDANCE_HEADER_ROW,
+                                       values_only=True), ())
+        wanted = set(dates) if dates is not None else None
+        # Without a recognisable Reg. No. header keep every non-date column so
+        # find_reg_no_column() can still pick it out by its values
+        any_reg = any(is_reg_no_header(h) for h in header)
+        keep, seen = [], set()
+        for i, h in enumerate(header):
+            if h is None or h in seen:
+                continue
+            d = column_date(h)
+            if d is None:
+                if is_reg_no_header(h) or not any_reg:
+                    keep.append(i); seen.add(h)
+            elif wanted is None or d in wanted:
+                keep.append(i); seen.add(h)
+        timings["header"] = time.perf_counter() - t0
+
+        # Stream the data rows, keeping only the selected cells
+        t0 = time.perf_counter()
+        rows = []
+        if keep:
+            last = max(keep) + 1
+            for row in att_ws.iter_rows(min_row=ATTENDANCE_HEADER_ROW + 1, max_col=last, values_only=True):
+                vals = [row[i] if i < len(row) else None for i in keep]
+                if any(v is not None for v in vals):
+                    rows.append(vals)
+        attendance_df = pd.DataFrame(rows, columns=[header[i] for i in keep], dtype=object)
+        timings["rows"] = time.perf_counter() - t0
+    finally:
+        wb.close()
+
+    print("⏱️ Excel load: " + ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in timings.items())
+          + f" ({len(attendance_df)} rows × {len(attendance_df.columns)} cols)")
+    return attendance_df, setup
+
+# --- Parsed-workbook cache (JSON next to attendance_config.json) ---
+EXCEL_CACHE_DIR = os.path.join(BASE_DIR, ".slcm_cache")
+EXCEL_CACHE_ENABLED = True
+EXCEL_CACHE_VERSION = 3
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def sheet_signatures(path):
+    """
+    {sheet name: signature} from the .xlsx zip directory (CRC + size of each
+    worksheet part, no decompression). Cell text lives in the shared string
+    table, so its CRC is folded into every sheet's signature.
+    """
+    ns = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+          "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+          "rel": "http://schemas.openxmlformats.org/package/2006/relationships"}
+    with zipfile.ZipFile(path) as z:
+        infos = {i.filename: i for i in z.infolist()}
+        shared = infos.get("xl/sharedStrings.xml")
+        shared_sig = f"{shared.CRC:08x}" if shared else "-"
+        rels = {r.get("Id"): r.get("Target") for r in
+                ElementTree.fromstring(z.read("xl/_rels/workbook.xml.rels")).findall("rel:Relationship", ns)}
+        sigs = {}
+        for sh in ElementTree.fromstring(z.read("xl/workbook.xml")).findall("m:sheets/m:sheet", ns):
+            target = rels.get(sh.get(f"{{{ns['r']}}}id"), "")
+            member = target.lstrip("/") if target.startswith("/") else "xl/" + target
+            info = infos.get(member)
+            if info:
+                sigs[sh.get("name")] = f"{info.CRC:08x}:{info.file_size}:{shared_sig}"
+    return sigs
+
+def _encode_header(h):
+    return {"dt": h.isoformat()} if isinstance(h, datetime) else h
+
+def _decode_header(h):
+    return datetime.fromisoformat(h["dt"]) if isinstance(h, dict) else h
+
+def _encode_cell(v):
+    return v if v is None or isinstance(v, (str, int, float, bool)) else str(v)
+
+def _date_positions(columns):
+    """{iso date: column position}, first column wins like build_date_index()."""
+    out = {}
+    for i, c in enumerate(columns):
+        d = column_date(c)
+        if d is not None:
+            out.setdefault(d.isoformat(), i)
+    return out
+
+def _cache_path(file_path):
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(EXCEL_CACHE_DIR, f"{key}.json")
+
+@traced()
+def load_workbook_cached(file_path, dates=None):
+    """
+    Same result as load_workbook(), served from a local cache when possible:
+    - path + mtime + size unchanged → cache hit without touching the workbook;
+    - otherwise, identical content hash → hit (file was only touched);
+    - otherwise only sheets whose signature changed are re-read.
+    The full Attendance grid is cached, so any set of dates can be sliced from it.
+    """
+    if not EXCEL_CACHE_ENABLED:
+        return load_workbook(file_path, dates)
+    t0 = time.perf_counter()
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        raise ValueError(f"Excel file not found: {file_path}") from None
+
+    cache_file = _cache_path(file_path)
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("version") != EXCEL_CACHE_VERSION:
+            cached = {}
+    except Exception:
+        cached = {}
+
+    sheets = cached.get("sheets", {})
+    fresh = cached.get("mtime") == st.st_mtime and cached.get("size") == st.st_size
+    sha1 = None
+    if not fresh and cached:
+        sha1 = _file_sha1(file_path)
+        fresh = cached.get("sha1") == sha1
+    if fresh and {"Initial Setup", "Attendance"} <= set(sheets):
+        how = "hit"
+    else:
+        try:
+            sigs = sheet_signatures(file_path)
+        except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+            raise ValueError(f"Failed to read Excel: {e}") from e
+        stale = [name for name in ("Initial Setup", "Attendance")
+                 if name not in sheets or sheets[name].get("sig") != sigs.get(name)]
+        how = f"re-read {', '.join(stale)}" if cached else "miss"
+        att_df, setup = load_workbook(file_path, None, sheets=stale)
+        if setup is not None:
+            sheets["Initial Setup"] = {"sig": sigs.get("Initial Setup"), "setup": setup}
+        if att_df is not None:
+            sheets["Attendance"] = {
+                "sig": sigs.get("Attendance"),
+                "columns": [_encode_header(c) for c in att_df.columns],
+                "rows": [[_encode_cell(v) for v in row] for row in att_df.itertuples(index=False, name=None)],
+                "date_index": _date_positions(att_df.columns),
+            }
+    # A plain hit (mtime + size unchanged) leaves the cache file as it is
+    if how != "hit" or sha1 is not None:
+        cached = {"version": EXCEL_CACHE_VERSION, "path": os.path.abspath(file_path),
+                  "mtime": st.st_mtime, "size": st.st_size,
+                  "sha1": sha1 or cached.get("sha1") or _file_sha1(file_path), "sheets": sheets}
+        try:
+            os.makedirs(EXCEL_CACHE_DIR, exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump(cached, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"⚠️ Could not save Excel cache: {e}")
+
+    att = sheets["Attendance"]
+    columns = [_decode_header(c) for c in att["columns"]]
+    keep = [i for i, c in enumerate(columns) if column_date(c) is None]
+    if dates is None:
+        keep = list(range(len(columns)))
+    else:
+        keep += [att["date_index"][d.isoformat()] for d in sorted(set(dates)) if d.isoformat() in att["date_index"]]
+    attendance_df = pd.DataFrame([[row[i] for i in keep] for row in att["rows"]],
+                                 columns=[columns[i] for i in keep], dtype=object)
+    print(f"⚡ Excel cache {how} ({(time.perf_counter() - t0) * 1000:.0f}ms)")
+    return attendance_df, dict(sheets["Initial Setup"]["setup"])
+
+def print_setup(setup):
+    print("\n📘 Course Details from Initial Setup:")
+    print(f"   Course Name   : {setup['course_name'] or '(blank)'}")
+    print(f"   Course Code   : {setup['course_code'] or '(blank)'}")
+    print(f"   Semester      : {setup['semester'] or '(blank)'}")
+    print(f"   Class Section : {setup['class_section'] or '(blank)'}  ")
+
+def missing_setup_fields(setup):
+    # Validate required fields (session optional / ignored)
+    missing = []
+    if not setup["course_code"]:   missing.append("Course Code (B2)")
+    if not setup["semester"]:      missing.append("Semester (B3)")
+    if not setup["class_section"]: missing.append("Class Section (B4)")
+    return missing
+
+EXCEL_EPOCH = date(1899, 12, 30)
+EXCEL_SERIAL_RANGE = (29221, 65380)  # 1980-01-01 .. 2078-12-31; keeps Sl. No. style ints out
+
+def _header_date_candidates(col):
+    """Every date an Attendance header cell could mean (more than one → ambiguous)."""
+    if isinstance(col, datetime):          # also pandas.Timestamp
+        return [col.date()]
+    if isinstance(col, date):
+        return [col]
+    if isinstance(col, (int, float)) and not isinstance(col, bool):
+        if EXCEL_SERIAL_RANGE[0] <= col <= EXCEL_SERIAL_RANGE[1] and float(col).is_integer():
+            return [EXCEL_EPOCH + timedelta(days=int(col))]
+        return []
+    if isinstance(col, str):
+        txt = col.strip()
+        # Historic header format is m/d/Y; it wins when both readings are valid
+        out = []
+        for f in ["%m/%d/%Y"] + DATE_FORMATS:
+            try:
+                d = datetime.strptime(txt, f).date()
+            except ValueError:
+                continue
+            if d not in out:
+                out.append(d)
+        return out
+    return []
+
+def column_date(col):
+    """Date represented by an Attendance header cell, or None."""
+    cands = _header_date_candidates(col)
+    return cands[0] if cands else None
+
+def build_date_index(columns):
+    """
+    Normalised {date: column} for a sheet's header, built once per workbook so
+    any number of date lookups are O(1). Returns (index, warnings); warnings
+    flag duplicate columns for the same date (first one wins) and headers that
+    read as different dates in d/m and m/d order.
+    """
+    index, warnings = {}, []
     for col in columns:
-        if isinstance(col, datetime) and col.date() == target_date:
+        cands = _header_date_candidates(col)
+        if not cands:
+            continue
+        d = cands[0]
+        if len(cands) > 1:
+            warnings.append(f"Ambiguous date header '{col}': using {d:%d/%m/%Y} "
+                            f"(could also be {', '.join(f'{c:%d/%m/%Y}' for c in cands[1:])})")
+        if d in index:
+            warnings.append(f"Duplicate column for {d:%d/%m/%Y}: '{col}' ignored, using '{index[d]}'")
+            continue
+        index[d] = col
+    return index, warnings
+
+def date_columns_with_entries(attendance_df):
+    """[(date, column)] for every date column that has at least one mark, in date order."""
+    found = {}
+    for d, col in build_date_index(attendance_df.columns)[0].items():
+        vals = attendance_df[col].dropna().astype(str).str.strip()
+        if (vals != "").any():
+            found[d] = col
+    return sorted(found.items())
+
+REG_NO_HEADER_RE = re.compile(r"^reg(istration)?\.?\s*(no|num|number)\.?$", re.I)
+REG_NO_VALUE_RE = r"^\d{6,12}(\.0+)?$"
+
+def is_reg_no_header(h) -> bool:
+    return isinstance(h, str) and bool(REG_NO_HEADER_RE.match(_norm(h)))
+
+def find_reg_no_column(attendance_df):
+    """
+    The Reg. No. column: by header ('Reg. No.', 'Reg No', 'Registration Number', …,
+    any spacing), else the non-date column whose values mostly look like
+    6–12 digit registration numbers.
+    """
+    for col in attendance_df.columns:
+        if is_reg_no_header(col):
             return col
-        if isinstance(col, str):
-            try:
-                if datetime.strptime(col, "%m/%d/%Y").date() == target_date:
-                    return col
-            except:
-                pass
-    return None
+    best, best_share = None, 0.5
+    for col in attendance_df.columns:
+        if column_date(col) is not None:
+            continue
+        vals = attendance_df[col].dropna().astype(str).str.strip()
+        if len(vals) == 0:
+            continue
+        share = vals.str.match(REG_NO_VALUE_RE).mean()
+        if share > best_share:
+            best, best_share = col, share
+    return best
 
-date_col = find_date_column(attendance_df.columns, selected_date)
-if date_col is None:
-    print("❌ No column found for the specified date in the 'Attendance' sheet.")
-    sys.exit(1)
-print(f"✅ Using date column in sheet: {date_col}")
-
-# Extract absentees
-reg_no_col = "Reg. No. "
-absentees = (
-    attendance_df[attendance_df[date_col].astype(str).str.lower() == "ab"][reg_no_col]
-    .astype(str)
-    .str.split(".")
-    .str[0]  # drop any decimals like ".0"
-    .tolist()
-)
-print("Absentees (IDs to untick):", absentees)
+def normalise_reg_nos(series):
+    """
+    Registration numbers as the text the portal shows: whitespace and a trailing
+    '.0' from numeric cells removed (230900123.0 → '230900123'); leading zeros
+    and non-numeric IDs are kept as they are. Blank cells become None.
+    """
+    regs = series.astype(str).str.strip().str.replace(r"\.0+$", "", regex=True)
+    return regs.where(~regs.str.lower().isin(["", "nan", "none", "null", "<na>"]), None)
+
+@traced()
+def absence_matrix(attendance_df):
+    """
+    The whole Attendance grid as one boolean frame: index = Reg. No. (page
+    text), columns = dates, True where the cell is 'ab'. Built in a single
+    vectorised pass, so the absentees of any date (or all dates) are a cheap
+    slice. Rows marked 'ab' without a readable Reg. No. are reported.
+    """
+    reg_col = find_reg_no_column(attendance_df)
+    if reg_col is None:
+        raise ValueError("Could not find the Reg. No. column in the 'Attendance' sheet")
+    date_index = build_date_index(attendance_df.columns)[0]
+    dates = sorted(date_index)
+    grid = attendance_df[[date_index[d] for d in dates]].to_numpy(dtype=str)
+    absent = np.char.lower(np.char.strip(grid)) == "ab"
+    regs = normalise_reg_nos(attendance_df[reg_col])
+    missing = regs.isna().to_numpy()
+    for i in np.flatnonzero(missing & absent.any(axis=1)):
+        when = ", ".join(f"{d:%d/%m/%Y}" for d, a in zip(dates, absent[i]) if a)
+        print(f"⚠️ Data row {i + 1}: no readable Reg. No. ({attendance_df[reg_col].iloc[i]!r}) "
+              f"but marked 'ab' on {when} — this student cannot be marked absent")
+    matrix = pd.DataFrame(absent, index=pd.Index(regs, name="reg_no", dtype=object), columns=dates)
+    return matrix[~missing]
+
+def absentees_for(matrix, d):
+    """Absentee IDs (as page text) for one date of an absence_matrix()."""
+    if d not in matrix.columns:
+        return []
+    return list(matrix.index[matrix[d].to_numpy()])
+
+def roster_for(matrix):
+    """Every Reg. No. on the Excel register, as page text."""
+    return list(matrix.index)
 
 # =============================
 # 3) Selenium with webdriver-manager (auto ChromeDriver) + Profile fallback
 # =============================
 PROFILE_DIR = os.path.abspath("./slcm_automation_profile")  # dedicated reusable profile
-os.makedirs(PROFILE_DIR, exist_ok=True)
+TEMP_PROFILE_DIR = None  # set when we fall back
+
+def prepare_profile_dir() -> bool:
+    """
+    Ready the dedicated profile. Returns False (locks untouched) when a live
+    daemon's Chrome holds it; callers then run on a copy instead.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if daemon_running():
+        return False
+    # Optional: clear leftover Chrome lock files if the profile isn't actually open
+    for name in os.listdir(PROFILE_DIR):
+        if name.startswith("Singleton"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, name))
+            except Exception:
+                pass
+    return True
+
+# --- ChromeDriver resolution: cached path, bundled driver, Selenium Manager, webdriver-manager ---
+_resolved_driver_path = None
+_driver_resolve_lock = threading.Lock()
 
-# Optional: clear leftover Chrome lock files if the profile isn't actually open
-for name in os.listdir(PROFILE_DIR):
-    if name.startswith("Singleton"):
+def detect_chrome_version():
+    """Installed Chrome version (e.g. '139.0.7258.66') without touching the network, or None."""
+    if sys.platform.startswith("win"):
         try:
-            os.remove(os.path.join(PROFILE_DIR, name))
-        except Exception:
+            import winreg
+            for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(hive, r"Software\Google\Chrome\BLBeacon") as key:
+                        return winreg.QueryValueEx(key, "version")[0]
+                except OSError:
+                    continue
+        except ImportError:
             pass
+        return None
+    candidates = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"] if sys.platform == "darwin" else \
+                 ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+    for exe in candidates:
+        try:
+            out = subprocess.run([exe, "--version"], capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        m = re.search(r"(\d+\.\d+\.\d+\.\d+)", out or "")
+        if m:
+            return m.group(1)
+    return None
 
-TEMP_PROFILE_DIR = None  # set when we fall back
+def _bundled_chromedriver():
+    """SLCM_CHROMEDRIVER env var, or a chromedriver(.exe) next to this script."""
+    env = os.environ.get("SLCM_CHROMEDRIVER")
+    if env and os.path.exists(env):
+        return env
+    for name in ("chromedriver.exe", "chromedriver"):
+        p = os.path.join(BASE_DIR, name)
+        if os.path.exists(p):
+            return p
+    return None
+
+def _selenium_manager_driver():
+    try:
+        from selenium.webdriver.common.selenium_manager import SeleniumManager
+        return SeleniumManager().binary_paths(["--browser", "chrome"]).get("driver_path") or None
+    except Exception:
+        return None
+
+@traced()
+def resolve_chromedriver():
+    """
+    chromedriver path as a constant-time local lookup in the common case: the
+    path cached in attendance_config.json is reused while the installed Chrome
+    major version is unchanged. Otherwise try a bundled driver, then Selenium
+    Manager (offline once its cache is warm), and only then webdriver-manager.
+    """
+    global _resolved_driver_path
+    with _driver_resolve_lock:
+        if _resolved_driver_path:
+            return _resolved_driver_path
+        version = detect_chrome_version()
+        major = version.split(".")[0] if version else None
+        cached = load_config().get("chromedriver") or {}
+        path = cached.get("path")
+        if path and os.path.exists(path) and (major is None or cached.get("chrome_major") == major):
+            _resolved_driver_path = path
+            return path
 
-def build_options(user_data_dir):
+        source = "bundled"
+        path = _bundled_chromedriver()
+        if not path:
+            source, path = "Selenium Manager", _selenium_manager_driver()
+        if not path:
+            source, path = "webdriver-manager", ChromeDriverManager().install()
+        print(f"🔧 ChromeDriver via {source}: {path} (Chrome {version or 'version unknown'})")
+        update_config(chromedriver={"path": path, "chrome_version": version, "chrome_major": major})
+        _resolved_driver_path = path
+        return path
+
+def forget_chromedriver():
+    global _resolved_driver_path
+    with _driver_resolve_lock:
+        _resolved_driver_path = None
+        update_config(chromedriver={})
+
+FAST_BROWSER = False  # --fast: headless + blocked assets once the profile is logged in
+
+# Chrome features the flow never needs
+FAST_BROWSER_ARGS = [
+    "--headless=new",
+    "--window-size=1600,1000",  # Lightning collapses its nav bar in small viewports
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-notifications",
+    "--mute-audio",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# Network.setBlockedURLs patterns: images, fonts, media and third-party/Lightning telemetry
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*InstrumentationBeacon*", "*/ui-telemetry*", "*/_ui/common/request/servlet/JsLoggingServlet*",
+]
+
+def build_options(user_data_dir, fast=None):
     opts = webdriver.ChromeOptions()
     opts.add_argument(f"--user-data-dir={user_data_dir}")
     opts.add_argument("--no-first-run")
     opts.add_argument("--no-default-browser-check")
-    # opts.add_argument("--headless=new")  # keep visible for SSO/Lightning
+    if FAST_BROWSER if fast is None else fast:
+        for arg in FAST_BROWSER_ARGS:
+            opts.add_argument(arg)
+    # otherwise keep visible for SSO/Lightning
     return opts
 
+def set_asset_blocking(driver, on=True):
+    """Drop images, fonts, media and telemetry at the network layer (CDP)."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS if on else []})
+        return True
+    except Exception as e:
+        print(f"⚠️ Could not set up request blocking: {e}")
+        return False
+
+@traced()
+def start_driver(user_data_dir, driver_path=None, fast=None):
+    from selenium.common.exceptions import SessionNotCreatedException
+    fast = FAST_BROWSER if fast is None else fast
+    try:
+        service = Service(driver_path or resolve_chromedriver())
+        driver = webdriver.Chrome(service=service, options=build_options(user_data_dir, fast))
+    except SessionNotCreatedException as e:
+        if "only supports chrome version" not in str(e).lower():
+            raise
+        # Cached driver is stale (Chrome updated but its version was not detectable)
+        print("⚠️ Cached ChromeDriver does not match Chrome — resolving again…")
+        forget_chromedriver()
+        driver_path = resolve_chromedriver()
+        service = Service(driver_path)
+        driver = webdriver.Chrome(service=service, options=build_options(user_data_dir, fast))
+    instrument_driver(driver)
+    # remembered so bootstrap_session can reopen the same profile visibly for SSO
+    driver._maa_profile, driver._maa_driver_path, driver._maa_fast = user_data_dir, driver_path, fast
+    if fast:
+        set_asset_blocking(driver)
+    return driver
+
+def page_load_ms(driver):
+    """Navigation timing of the current page (ms), or None."""
+    try:
+        return driver.execute_script(
+            "const n = performance.getEntriesByType('navigation')[0];"
+            "return n ? Math.round(n.loadEventEnd > 0 ? n.loadEventEnd : n.duration) : null;")
+    except Exception:
+        return None
+
+def compare_asset_blocking(driver, url=HOME_URL):
+    """Load `url` with and without request blocking and print both load times."""
+    times = {}
+    for on in (False, True):
+        set_asset_blocking(driver, on)
+        hard_nav(driver, url)
+        times[on] = page_load_ms(driver)
+    fmt = lambda v: f"{v} ms" if v is not None else "n/a"
+    print(f"⏱️ Page load {url}: without blocking {fmt(times[False])}, with blocking {fmt(times[True])}")
+    return times
+
 def start_driver_with_fallback():
-    """Try dedicated profile; if locked, fall back to a fresh temp profile."""
+    """
+    Try dedicated profile; if the daemon holds it, run on a copy (keeps the SSO
+    cookies); if it is otherwise locked, fall back to a fresh temp profile.
+    """
+    from selenium.common.exceptions import SessionNotCreatedException
     global TEMP_PROFILE_DIR
+    if not prepare_profile_dir():
+        print("⚠️ Dedicated profile is held by the running daemon. Using a copy of it...")
+        TEMP_PROFILE_DIR = clone_profile(prefix="slcm_profile_")
+        return start_driver(TEMP_PROFILE_DIR)
     try:
-        options = build_options(PROFILE_DIR)
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=options)
+        return start_driver(PROFILE_DIR)
     except SessionNotCreatedException:
         print("⚠️ Dedicated profile is in use/locked. Falling back to a fresh temp profile...")
         TEMP_PROFILE_DIR = tempfile.mkdtemp(prefix="slcm_profile_")
-        options = build_options(TEMP_PROFILE_DIR)
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=options)
+        return start_driver(TEMP_PROFILE_DIR)
 
-driver = start_driver_with_fallback()
-print(f"👤 Using Chrome profile dir: {TEMP_PROFILE_DIR or PROFILE_DIR}")
+# Cache/lock entries that are safe (and faster) to leave out of a cloned profile
+PROFILE_CLONE_IGNORE = shutil.ignore_patterns(
+    "Singleton*", "lockfile", "LOCK", "Cache", "Code Cache", "GPUCache",
+    "ShaderCache", "GrShaderCache", "Crashpad", "BrowserMetrics*",
+)
 
-# --- Bootstrap / SSO ---
-if not hard_nav(driver, HOME_URL):
-    hard_nav(driver, BASE_URL)
-    hard_nav(driver, HOME_URL)
+def clone_profile(prefix="slcm_worker_"):
+    """Copy the logged-in profile to a temp dir so another Chrome can use its SSO cookies."""
+    dst = tempfile.mkdtemp(prefix=prefix)
+    shutil.copytree(PROFILE_DIR, dst, ignore=PROFILE_CLONE_IGNORE, dirs_exist_ok=True)
+    return dst
 
-cur = driver.current_url.lower()
-print("🌐 After bootstrap:", cur)
+def cleanup_temp_profile():
+    global TEMP_PROFILE_DIR
+    if TEMP_PROFILE_DIR:
+        try: shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
+        except Exception: pass
+        TEMP_PROFILE_DIR = None
 
-if ("login.microsoftonline.com" in cur) or ("saml" in cur) or ("manipal.edu" in cur and "/login" in cur):
-    print("🔐 SSO/login detected. Complete it in the opened Chrome window.")
-    try:
-        input("Press Enter here AFTER you reach Salesforce Home... ")
-    except EOFError:
-        print("⏳ Waiting 60s for manual login (no console input available)...")
-        time.sleep(60)
-    hard_nav(driver, HOME_URL)
+def is_sso_url(url: str) -> bool:
+    cur = (url or "").lower()
+    return ("login.microsoftonline.com" in cur) or ("saml" in cur) or ("manipal.edu" in cur and "/login" in cur)
 
-WebDriverWait(driver, 60).until(EC.presence_of_element_located((By.XPATH, "//a[@title='Calendar']")))
-print("✅ Logged in & on Lightning Home")
+@traced()
+def bootstrap_session(driver, interactive=True):
+    """
+    Land on Lightning Home, pausing for manual SSO if the profile is not logged in.
+    Non-interactive sessions (parallel workers) raise instead of prompting.
+    A headless (--fast) browser that lands on SSO is swapped for a visible one on
+    the same profile. Returns the driver to keep using.
+    """
+    if not hard_nav(driver, HOME_URL):
+        hard_nav(driver, BASE_URL)
+        hard_nav(driver, HOME_URL)
+
+    cur = driver.current_url.lower()
+    print("🌐 After bootstrap:", cur)
+
+    if is_sso_url(cur):
+        if not interactive:
+            raise RuntimeError("SSO/login required — run once without --workers to log in")
+        if getattr(driver, "_maa_fast", False):
+            print("🪟 SSO needed — reopening Chrome visibly for login…")
+            profile, driver_path = driver._maa_profile, driver._maa_driver_path
+            driver.quit()
+            driver = start_driver(profile, driver_path, fast=False)
+            hard_nav(driver, HOME_URL)
+        if is_sso_url(driver.current_url):
+            print("🔐 SSO/login detected. Complete it in the opened Chrome window.")
+            try:
+                input("Press Enter here AFTER you reach Salesforce Home... ")
+            except EOFError:
+                print("⏳ Waiting 60s for manual login (no console input available)...")
+                time.sleep(60)
+            hard_nav(driver, HOME_URL)
+
+    WebDriverWait(driver, 60).until(EC.presence_of_element_located((By.XPATH, "//a[@title='Calendar']")))
+    print("✅ Logged in & on Lightning Home")
+    load = page_load_ms(driver)
+    if load is not None:
+        print(f"⏱️ Home page load: {load} ms{' (assets blocked)' if getattr(driver, '_maa_fast', False) else ''}")
+    return driver
 
 # =============================
 # 4) Calendar → date → down-only scroll to the day's panel → open event
 # =============================
-# Open Calendar tab
-cal_tab = WebDriverWait(driver, 40).until(
-    EC.element_to_be_clickable((By.XPATH, "//a[@title='Calendar']"))
-)
-js_click(driver, cal_tab)
+@traced()
+def open_calendar(driver):
+    from selenium.common.exceptions import TimeoutException
+    try:
+        cal_tab = WebDriverWait(driver, 40).until(
+            EC.element_to_be_clickable((By.XPATH, "//a[@title='Calendar']"))
+        )
+    except TimeoutException:
+        # e.g. still on a record page whose nav bar has not rendered — go Home first
+        hard_nav(driver, HOME_URL)
+        cal_tab = WebDriverWait(driver, 40).until(
+            EC.element_to_be_clickable((By.XPATH, "//a[@title='Calendar']"))
+        )
+    js_click(driver, cal_tab)
+    WebDriverWait(driver, WAIT_TIMEOUTS["calendar"]).until(EC.presence_of_element_located((By.ID, "calendarSidebar")))
+    wait_dom(driver, "present", "#calendarSidebar .slds-day", step="calendar")
 
-# Click date (mini calendar)
-WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.ID, "calendarSidebar")))
-time.sleep(0.15)
-day_number = str(selected_date.day).lstrip("0")
-ok = driver.execute_script("""
+MINI_CAL_MONTH_JS = """
+const wrap = document.querySelector('#calendarSidebar');
+if (!wrap) return null;
+const months = ['january','february','march','april','may','june','july',
+                'august','september','october','november','december'];
+const nodes = wrap.querySelectorAll('h2, .slds-datepicker__month, [aria-live]');
+for (const n of nodes) {
+  const t = (n.textContent || '').toLowerCase();
+  const m = months.findIndex(x => t.includes(x));
+  const y = t.match(/(\\d{4})/);
+  if (m >= 0 && y) return {month: m + 1, year: parseInt(y[1], 10)};
+}
+// Month in a header, year in the year <select>
+const sel = wrap.querySelector('select');
+const head = wrap.querySelector('h2');
+const mi = head ? months.findIndex(x => (head.textContent || '').toLowerCase().includes(x)) : -1;
+if (mi >= 0 && sel && /^\\d{4}$/.test(sel.value)) return {month: mi + 1, year: parseInt(sel.value, 10)};
+return null;
+"""
+
+MINI_CAL_STEP_JS = """
 const wrap = document.querySelector('#calendarSidebar');
 if (!wrap) return false;
-const dayNodes = wrap.querySelectorAll('table.datepicker .slds-day, .slds-day');
-for (const n of dayNodes) {
-  const txt = (n.textContent || '').trim();
-  const disabled = n.getAttribute('aria-disabled') === 'true' || (n.className || '').includes('disabled');
-  if (!disabled && txt === arguments[0]) {
-    n.scrollIntoView({block:'center'}); n.click(); return true;
-  }
+const want = arguments[0] > 0 ? 'next' : 'previous';
+const btns = Array.from(wrap.querySelectorAll('button, a'));
+const b = btns.find(x => ((x.getAttribute('title') || x.getAttribute('aria-label') || x.textContent || '')
+                          .toLowerCase().includes(want)));
+if (!b) return false;
+b.click();
+return true;
+"""
+
+def sync_mini_calendar_month(driver, target_date, max_steps=24):
+    """
+    Page the mini calendar to the target month. Best effort: if the sidebar's
+    month header cannot be read we leave it alone (same-month behaviour).
+    """
+    for _ in range(max_steps):
+        shown = driver.execute_script(MINI_CAL_MONTH_JS)
+        if not shown:
+            return False
+        delta = (target_date.year - shown["year"]) * 12 + (target_date.month - shown["month"])
+        if delta == 0:
+            return True
+        if not driver.execute_script(MINI_CAL_STEP_JS, 1 if delta > 0 else -1):
+            return False
+        wait_frames(driver)
+    return False
+
+@traced()
+def click_mini_calendar_date(driver, target_date):
+    sync_mini_calendar_month(driver, target_date)
+    day_number = str(target_date.day).lstrip("0")
+    ok = driver.execute_script("""
+    const wrap = document.querySelector('#calendarSidebar');
+    if (!wrap) return false;
+    const dayNodes = wrap.querySelectorAll('table.datepicker .slds-day, .slds-day');
+    for (const n of dayNodes) {
+      const txt = (n.textContent || '').trim();
+      const disabled = n.getAttribute('aria-disabled') === 'true' || (n.className || '').includes('disabled');
+      if (!disabled && txt === arguments[0]) {
+        n.scrollIntoView({block:'center'}); n.click(); return true;
+      }
+    }
+    return false;
+    """, day_number)
+    if not ok:
+        raise RuntimeError(f"❌ Could not click mini calendar date {day_number}")
+    print(f"✅ Clicked calendar date (fast): {day_number}")
+
+def open_day_panel(driver, target_date):
+    """
+    Calendar → day → scrolled day panel. Returns (None, located) on success,
+    where located is locate_day_panel()'s result, else (failure reason, None).
+    """
+    open_calendar(driver)
+    click_mini_calendar_date(driver, target_date)
+
+    # Down-only jump to the correct day's panel (day list wait included)
+    disable_auto_scroll(driver)
+    try:
+        located = locate_day_panel(driver, target_date)
+        if not located.get("found") and located.get("reason") != "heading not found":
+            # locator script itself failed (or no day list yet) — use the step-by-step scroll
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, ".calendarRow.slds-scrollable_y")))
+            if scroll_to_day_panel(driver, target_date, timeout=40):
+                located = {"found": True, "panel": get_day_panel_webelement(driver, target_date)}
+    finally:
+        enable_auto_scroll(driver)
+
+    if not located.get("found"):
+        print("⚠️ Could not scroll down to the selected day's panel.")
+        return "day panel not found", None
+    if "ms" in located:
+        print(f"✅ Day panel located in {located['ms']} ms ({len(located.get('tiles') or [])} tile(s))")
+    return None, located
+
+def open_class_for_date(driver, target_date, setup) -> str | None:
+    """
+    Calendar → day → event record page. Returns None on success, or a short
+    failure reason for the summary.
+    """
+    reason, located = open_day_panel(driver, target_date)
+    if reason:
+        return reason
+    prefill_event_cache(driver, target_date, [setup])
+
+    # Open event strictly from that day panel
+    if not open_event_from_day_panel(driver, target_date, setup["course_code"], setup["semester"],
+                                     setup["class_section"], None, panel=located.get("panel"),
+                                     tiles=located.get("tiles")):
+        print("❌ Could not open any candidate event tile for the selected date.")
+        return "no matching event"
+
+    # "More Details" if a popover appears; otherwise Lightning may navigate directly
+    try:
+        more_details = WebDriverWait(driver, 6).until(
+            EC.element_to_be_clickable((By.XPATH, "//a[normalize-space()='More Details']"))
+        )
+        js_click(driver, more_details)
+    except Exception:
+        pass  # direct navigation case
+    return None
+
+# =============================
+# Event record cache: (course, semester, section, date) → /lightning/r/ URL
+# =============================
+EVENT_CACHE_FILE = os.path.join(BASE_DIR, "slcm_event_cache.json")
+EVENT_CACHE_ENABLED = True
+_event_cache = None
+_event_cache_lock = threading.Lock()
+
+def _load_event_cache():
+    global _event_cache
+    if _event_cache is None:
+        try:
+            with open(EVENT_CACHE_FILE, "r", encoding="utf-8") as f:
+                _event_cache = json.load(f)
+        except Exception:
+            _event_cache = {}
+    return _event_cache
+
+def _save_event_cache():
+    try:
+        with open(EVENT_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(_event_cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+    except Exception as e:
+        print(f"⚠️ Could not save event cache: {e}")
+
+def event_cache_key(setup, d: date) -> str:
+    return "|".join([setup["course_code"].upper(), setup["semester"].upper(),
+                     setup["class_section"].upper(), d.isoformat()])
+
+def get_cached_event(setup, d):
+    if not EVENT_CACHE_ENABLED:
+        return None
+    with _event_cache_lock:
+        return _load_event_cache().get(event_cache_key(setup, d))
+
+def put_cached_events(items):
+    """items: {(setup-key, date): href}"""
+    if not EVENT_CACHE_ENABLED or not items:
+        return
+    with _event_cache_lock:
+        cache = _load_event_cache()
+        changed = False
+        for key, href in items.items():
+            if cache.get(key) != href:
+                cache[key] = href
+                changed = True
+        if changed:
+            _save_event_cache()
+
+def invalidate_cached_event(setup, d):
+    with _event_cache_lock:
+        if _load_event_cache().pop(event_cache_key(setup, d), None) is not None:
+            _save_event_cache()
+
+SCAN_DAY_PANELS_JS = """
+const cont = document.querySelector('.calendarRow.slds-scrollable_y');
+if (!cont) return [];
+function t(n){ return (n && (n.innerText || n.textContent) || '').trim(); }
+const out = [];
+for (const h of cont.querySelectorAll('h2.slds-assistive-text')) {
+  let sib = h.nextElementSibling;
+  while (sib && !sib.classList.contains('calendarDay')) sib = sib.nextElementSibling;
+  if (!sib) continue;
+  const tiles = Array.from(sib.querySelectorAll("a.subject-link, a[data-id='subject-link']"))
+                     .map(a => ({text: t(a), href: a.getAttribute('href') || ''}));
+  out.push({heading: t(h), tiles: tiles});
 }
-return false;
-""", day_number)
-if not ok:
-    raise RuntimeError(f"❌ Could not click mini calendar date {day_number}")
-print(f"✅ Clicked calendar date (fast): {day_number}")
-
-# Ensure day list exists
-WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".calendarRow.slds-scrollable_y")))
-
-# Down-only scroll to the correct day's panel
-disable_auto_scroll(driver)
-try:
-    ok_scroll = scroll_to_day_panel(driver, selected_date, timeout=40)
-finally:
-    enable_auto_scroll(driver)
-
-if not ok_scroll:
-    print("⚠️ Could not scroll down to the selected day's panel.")
-    driver.quit()
-    if TEMP_PROFILE_DIR:
-        try: shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
-        except Exception: pass
-    sys.exit(1)
+return out;
+"""
 
-# Open event strictly from that day panel
-if not open_event_from_day_panel(driver, selected_date, course_code, semester, class_section, None):
-    driver.quit()
-    if TEMP_PROFILE_DIR:
-        try: shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
-        except Exception: pass
-    raise RuntimeError("❌ Could not open any candidate event tile for the selected date.")
+def heading_to_date(heading: str, near: date):
+    """'Saturday, August 23' (year inferred as the one closest to `near`) or with ', 2025'."""
+    txt = _norm(heading)
+    for fmt in ("%A, %B %d, %Y", "%A, %B %d %Y"):
+        try:
+            return datetime.strptime(txt, fmt).date()
+        except ValueError:
+            pass
+    try:
+        md = datetime.strptime(txt.split(", ", 1)[1], "%B %d")
+    except (IndexError, ValueError):
+        return None
+    best = None
+    for yr in (near.year - 1, near.year, near.year + 1):
+        try:
+            cand = date(yr, md.month, md.day)
+        except ValueError:
+            continue
+        if best is None or abs((cand - near).days) < abs((best - near).days):
+            best = cand
+    return best
 
-# "More Details" if a popover appears; otherwise Lightning may navigate directly
-try:
-    more_details = WebDriverWait(driver, 6).until(
-        EC.element_to_be_clickable((By.XPATH, "//a[normalize-space()='More Details']"))
-    )
-    js_click(driver, more_details)
-except Exception:
-    pass  # direct navigation case
+@traced()
+def prefill_event_cache(driver, near_date, setups) -> dict:
+    """
+    Scan every day panel currently rendered (typically the visible week) in one
+    call and cache the record href of each tile matching one of `setups`.
+    Returns {(setup index, date): href}.
+    """
+    try:
+        panels = driver.execute_script(SCAN_DAY_PANELS_JS) or []
+    except Exception:
+        return {}
+    found, to_cache = {}, {}
+    for panel in panels:
+        d = heading_to_date(panel.get("heading", ""), near_date)
+        if d is None:
+            continue
+        for tile in panel.get("tiles", []):
+            href = tile.get("href") or ""
+            if not tile.get("text") or "lightning/r/" not in href:
+                continue
+            for i, setup in enumerate(setups):
+                if (i, d) in found:
+                    continue
+                if matches_event_text(tile["text"], setup["course_code"], setup["semester"],
+                                      setup["class_section"], None, verbose=False):
+                    found[(i, d)] = href
+                    to_cache[event_cache_key(setup, d)] = href
+    put_cached_events(to_cache)
+    return found
+
+@traced()
+def open_record_page(driver, href) -> bool:
+    """Go straight to an event record; False if it no longer resolves."""
+    url = href if href.startswith("http") else BASE_URL + href
+    if not hard_nav(driver, url):
+        return False
+    return wait_dom(driver, "record", step="record") == "ok"
+
+# =============================
+# Checkpoint journal: append-only record of every submitted (workbook, date)
+# =============================
+JOURNAL_FILE = os.path.join(BASE_DIR, "slcm_journal.jsonl")
+JOURNAL_ENABLED = True   # --no-journal
+JOURNAL_FORCE = False    # --force: redo jobs even if the journal has them confirmed
+_journal_lock = threading.Lock()
+
+def absentee_hash(absentees) -> str:
+    return hashlib.sha1("\n".join(sorted(map(str, absentees))).encode()).hexdigest()[:16]
+
+def journal_key(path, setup, d) -> str:
+    return "|".join([os.path.abspath(path), setup["course_code"], setup["semester"],
+                     setup["class_section"], d.isoformat()])
+
+def _confirmed(res) -> bool:
+    """Submitted, and the read-back did not disagree with Excel about any student on the roster."""
+    v = res.get("verification") or {}
+    return job_ok(res) and not v.get("present_but_absent_in_excel") \
+        and not v.get("absent_but_present_in_excel")
+
+def load_journal() -> dict:
+    """Latest journal entry per job key (later lines win; a torn last line is ignored)."""
+    latest = {}
+    if not JOURNAL_ENABLED or not os.path.exists(JOURNAL_FILE):
+        return latest
+    with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                latest[entry["key"]] = entry
+            except (ValueError, KeyError):
+                continue
+    return latest
+
+def journal_result(wb, d, absentees, res):
+    """Append one finished job to the journal (flushed to disk before returning)."""
+    if not JOURNAL_ENABLED:
+        return
+    setup = wb["setup"]
+    entry = {
+        "key": journal_key(wb["path"], setup, d),
+        "workbook": os.path.abspath(wb["path"]), "course": setup["course_code"], "semester": setup["semester"],
+        "section": setup["class_section"], "date": d.isoformat(),
+        "absentees": len(absentees), "absentee_hash": absentee_hash(absentees),
+        "status": res["status"], "confirmed": _confirmed(res),
+        "ts": datetime.now().isoformat(timespec="seconds"),
+    }
+    try:
+        with _journal_lock, open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception as e:
+        print(f"⚠️ Could not write the journal: {e}")
+
+def skip_journaled(plan, journal=None):
+    """
+    Drop jobs the journal has confirmed with the same absentees; jobs whose
+    Excel absentees changed since (or that never got confirmed) stay queued.
+    Workbooks left without jobs are removed. Returns the number skipped.
+    """
+    if not JOURNAL_ENABLED or JOURNAL_FORCE:
+        return 0
+    journal = load_journal() if journal is None else journal
+    skipped = 0
+    for wb in plan:
+        keep = []
+        for d, col in wb["jobs"]:
+            entry = journal.get(journal_key(wb["path"], wb["setup"], d))
+            if entry and entry.get("confirmed"):
+                if entry.get("absentee_hash") == absentee_hash(absentees_for(wb["absent"], d)):
+                    print(f"⏭️ {wb['label']} {d:%d/%m/%Y}: already submitted ({entry.get('ts')}) — skipping")
+                    skipped += 1
+                    continue
+                print(f"🔁 {wb['label']} {d:%d/%m/%Y}: absentees changed since {entry.get('ts')} — re-queued")
+            keep.append((d, col))
+        wb["jobs"] = keep
+    plan[:] = [wb for wb in plan if wb["jobs"]]
+    return skipped
 
 # =============================
 # Attendance tab helpers
@@ -671,224 +2091,1302 @@ def click_attendance_tab_fast(driver) -> bool:
     except Exception:
         return False
 
-def open_attendance_tab_robust(driver, click_func, max_retries: int = 1) -> bool:
+# --- Recovery from the Lightning page error: remedy ladder + backoff + stats ---
+RECOVERY_BACKOFF = (0.5, 8.0)  # first delay and cap (s); doubled per step, with jitter
+# Escalation order and assumed round trips before any stats exist
+RECOVERY_REMEDIES = {"reclick": 4, "soft_nav": 8, "reload": 10, "new_tab": 16}
+_recovery_stats = None  # {remedy: {"tries", "ok", "trips"}}, kept in attendance_config.json
+_recovery_lock = threading.Lock()
+_remedies_this_run = 0
+
+SOFT_NAV_JS = """
+const url = arguments[0];
+try {
+  const ev = window.$A && $A.get('e.force:navigateToURL');
+  if (ev) { ev.setParams({url: url}); ev.fire(); return 'aura'; }
+} catch (e) {}
+history.pushState({}, '', url);
+window.dispatchEvent(new PopStateEvent('popstate', {state: {}}));
+return 'popstate';
+"""
+
+def _recovery_stats_table():
+    global _recovery_stats
+    if _recovery_stats is None:
+        saved = load_config().get("recovery_stats") or {}
+        _recovery_stats = {name: dict({"tries": 0, "ok": 0, "trips": 0}, **saved.get(name, {}))
+                           for name in RECOVERY_REMEDIES}
+    return _recovery_stats
+
+def recovery_ladder():
     """
-    Try to open the Attendance tab. If Salesforce throws its generic page error,
-    refresh and retry (up to max_retries).
+    Remedies cheapest-expected-first: round trips spent per success so far,
+    seeded with one assumed success at RECOVERY_REMEDIES' cost (ties keep
+    the escalation order).
     """
-    for attempt in range(max_retries + 1):
-        ok = click_func(driver)
-        if not ok:
-            time.sleep(0.7)
-        time.sleep(1.2)  # let the tab render
-
-        if not has_salesforce_error(driver):
-            return True
-
-        if attempt < max_retries:
-            print("⚠️ Lightning error on Attendance tab — refreshing and retrying…")
+    stats = _recovery_stats_table()
+    def cost(name):
+        st = stats[name]
+        return (st["trips"] + RECOVERY_REMEDIES[name]) / (st["ok"] + 1)
+    return sorted(RECOVERY_REMEDIES, key=cost)
+
+def _record_remedy(name, ok, trips):
+    global _remedies_this_run
+    with _recovery_lock:
+        _remedies_this_run += 1
+        st = _recovery_stats_table()[name]
+        st["tries"] += 1
+        st["ok"] += int(ok)
+        st["trips"] += trips
+        update_config(recovery_stats=_recovery_stats)
+
+def print_recovery_stats():
+    if not _remedies_this_run:
+        return
+    stats = _recovery_stats_table()
+    print("\n🩹 Lightning error recovery (all runs)")
+    for name in RECOVERY_REMEDIES:
+        st = stats[name]
+        if st["tries"]:
+            print(f"   {name:<10}{st['ok']:>4}/{st['tries']:<4} ok  {st['trips'] / st['tries']:.1f} round trips/try")
+
+def backoff_delay(step):
+    first, cap = RECOVERY_BACKOFF
+    return min(cap, first * 2 ** step) * random.uniform(0.5, 1.0)
+
+REMEDIES_NEEDING_URL = ("soft_nav", "new_tab")
+
+def _apply_remedy(driver, name, url, click_func):
+    """Run one remedy; returns the Attendance tab state afterwards ('table', 'error' or False)."""
+    if name == "soft_nav" and url:
+        driver.execute_script(SOFT_NAV_JS, url)
+        wait_idle(driver, step="reload")
+    elif name == "reload":
+        try:
+            driver.refresh()
+        except Exception:
+            pass
+        wait_idle(driver, step="reload")
+    elif name == "new_tab" and url:
+        old = driver.current_window_handle
+        driver.switch_to.new_window("tab")
+        if not hard_nav(driver, url):
+            return False
+        new = driver.current_window_handle
+        if new != old:
             try:
-                driver.refresh()
+                driver.switch_to.window(old)
+                driver.close()
             except Exception:
                 pass
+            driver.switch_to.window(new)
+        wait_dom(driver, "record", step="record")
+    elif name != "reclick":
+        return False
+    click_func(driver)
+    return wait_dom(driver, "attendance", step="attendance_tab")
+
+@traced()
+def open_attendance_tab_robust(driver, click_func, max_retries=None) -> bool:
+    """
+    Open the Attendance tab. On the generic Lightning page error, walk the
+    remedy ladder (re-click the tab, in-app navigation to the record, reload,
+    fresh tab), cheapest-expected-first, with exponential backoff and jitter
+    between steps. Tries at most max_retries remedies (default: all); remedies
+    that need the record URL are left out when it is not known.
+    """
+    click_func(driver)
+    # Resolves as soon as the table/submit button or the Lightning error renders
+    state = wait_dom(driver, "attendance", step="attendance_tab")
+    if state == "table" or (state != "error" and not has_salesforce_error(driver)):
+        return True
+
+    # Only a rendered record page has its final URL (the Calendar path may still be navigating)
+    url = driver.current_url if wait_dom(driver, "record", step="record") == "ok" else None
+    ladder = [name for name in recovery_ladder() if url or name not in REMEDIES_NEEDING_URL][:max_retries]
+    for step, name in enumerate(ladder):
+        delay = backoff_delay(step)
+        print(f"⚠️ Lightning error on Attendance tab — trying {name} in {delay:.1f}s…")
+        time.sleep(delay)
+        trips0 = _round_trips()
+        try:
+            state = _apply_remedy(driver, name, url, click_func)
+        except Exception as e:
+            print(f"   {name} failed: {e}")
+            state = False
+        ok = state == "table" or (state != "error" and not has_salesforce_error(driver))
+        _record_remedy(name, ok, _round_trips() - trips0)
+        if ok:
+            print(f"✅ Recovered with {name}")
+            return True
+    return False
+
+# --- Attendance table snapshot: Reg. No., name and checkbox state in one read ---
+SNAPSHOT_TABLE_JS = """
+function t(n){ return (n && (n.innerText || n.textContent) || '').trim(); }
+const rows = [], seen = new Set();
+for (const tr of document.querySelectorAll('tr')) {
+  const cb = tr.querySelector("input[type='checkbox']");
+  if (!cb) continue;
+  const texts = Array.from(tr.querySelectorAll('lightning-base-formatted-text')).map(t).filter(Boolean);
+  if (!texts.length) continue;
+  const reg = texts.find(x => /^\\d{5,}$/.test(x)) || texts[0];
+  if (seen.has(reg)) continue;
+  seen.add(reg);
+  const name = texts.find(x => x !== reg && !/^\\d+$/.test(x)) || '';
+  rows.push({reg: reg, name: name, checked: !!cb.checked});
+}
+return rows;
+"""
+
+# Click the checkbox of every listed Reg. No. whose state differs from `checked`
+SET_ROWS_JS = """
+const ids = new Set(arguments[0].map(String)), want = !!arguments[1];
+const out = {};
+for (const c of document.querySelectorAll('lightning-base-formatted-text')) {
+  const id = (c.innerText || c.textContent || '').trim();
+  if (!ids.has(id) || id in out) continue;
+  const tr = c.closest('tr');
+  const cb = tr && tr.querySelector("input[type='checkbox']");
+  if (!cb) continue;
+  if (cb.checked !== want) cb.click();
+  out[id] = cb.checked === want ? 'ok' : 'stuck';
+}
+return out;
+"""
+
+@traced()
+def snapshot_attendance_table(driver, wait=True) -> dict:
+    """{reg_no: {"name", "checked"}} for every row of the Attendance tab table ({} if not rendered)."""
+    if wait and not wait_dom(driver, "rows", step="table"):
+        return {}
+    try:
+        rows = driver.execute_script(SNAPSHOT_TABLE_JS) or []
+    except Exception:
+        return {}
+    return {r["reg"]: {"name": r.get("name", ""), "checked": bool(r.get("checked"))} for r in rows}
+
+@traced()
+def read_back_attendance(driver) -> dict:
+    """
+    Snapshot of what the portal saved: the table on screen still holds our own
+    clicks, so the record is reloaded and its Attendance tab re-opened first
+    ({} if it does not render again).
+    """
+    try:
+        driver.refresh()
+    except Exception:
+        return {}
+    wait_idle(driver, step="reload")
+    if wait_dom(driver, "record", step="record") != "ok":
+        return {}
+    if not open_attendance_tab_robust(driver, click_attendance_tab_fast, max_retries=1):
+        return {}
+    return snapshot_attendance_table(driver)
+
+def set_rows_checked(driver, ids, checked) -> dict:
+    """Set the checkbox of each Reg. No. in `ids` in one call → {id: 'ok' | 'stuck'} (missing ids absent)."""
+    if not ids:
+        return {}
+    return driver.execute_script(SET_ROWS_JS, list(ids), bool(checked)) or {}
+
+def untick_absentees_from_snapshot(driver, absentees, snapshot):
+    """
+    Untick absentees using a table snapshot: IDs not in it are not_found, IDs
+    already unticked are left alone, the rest are unticked in a single call.
+    Rows whose click did not take are retried through the per-ID path and are
+    'stuck' if that fails too.
+    Returns {id: 'unticked' | 'already' | 'not_found' | 'stuck'}.
+    """
+    results = {}
+    to_untick = []
+    for ab in absentees:
+        row = snapshot.get(ab)
+        if row is None:
+            results[ab] = "not_found"
+        elif not row["checked"]:
+            results[ab] = "already"
+        else:
+            to_untick.append(ab)
+    done = set_rows_checked(driver, to_untick, False)
+    stuck = []
+    for ab in to_untick:
+        if done.get(ab) == "stuck":
+            stuck.append(ab)
+        else:
+            results[ab] = "unticked" if done.get(ab) == "ok" else "not_found"
+    if stuck:
+        print(f"⚠️ {len(stuck)} checkbox(es) did not untick — retrying one by one")
+        retried = untick_absentees_per_id(driver, stuck)
+        for ab in stuck:
+            results[ab] = retried[ab] if retried.get(ab) in ("unticked", "already") else "stuck"
+    return results
+
+def untick_absentee_once(driver, ab):
+    cell = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.XPATH, f"//lightning-base-formatted-text[normalize-space()='{ab}']"))
+    )
+    row = cell.find_element(By.XPATH, "./ancestor::tr")
+    checkbox = row.find_element(By.XPATH, ".//input[@type='checkbox']")
+    driver.execute_script("arguments[0].scrollIntoView({block:'center'});", checkbox)
+    if checkbox.is_selected():
+        js_click(driver, checkbox)
+        return True
+    return False
+
+def untick_absentees_per_id(driver, absentees):
+    """Legacy path: one WebDriverWait + XPath lookup per absentee, with retries."""
+    from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+    results = {}
+    for ab in absentees:
+        results[ab] = "not_found"
+        attempts = 0
+        while attempts < 4:
             try:
-                WebDriverWait(driver, 25).until(
-                    lambda d: d.execute_script("return document.readyState") == "complete"
-                )
+                results[ab] = "unticked" if untick_absentee_once(driver, ab) else "already"
+                break
+            except (StaleElementReferenceException, TimeoutException):
+                attempts += 1
+                time.sleep(0.3)
             except Exception:
-                time.sleep(1.5)
-    return False
+                break
+    return results
+
+@traced()
+def untick_absentees(driver, absentees, snapshot=None):
+    if snapshot is None:
+        snapshot = snapshot_attendance_table(driver)
+    if not snapshot:
+        print("⚠️ Attendance table not detected for batch untick — falling back to per-ID lookups.")
+        return untick_absentees_per_id(driver, absentees)
+    return untick_absentees_from_snapshot(driver, absentees, snapshot)
+
+# --- Post-submit verification against the Excel register ---
+def verify_attendance(snapshot, absentees, roster=None) -> dict:
+    """
+    Compare a table snapshot with the Excel register. Every list is a set of
+    Reg. Nos.; all empty means the portal matches Excel.
+    """
+    absent = set(absentees)
+    portal = set(snapshot)
+    v = {
+        # marked 'ab' in Excel but not on the portal roster
+        "absent_not_on_roster": sorted(absent - portal),
+        # portal still shows present although Excel says absent
+        "present_but_absent_in_excel": sorted(r for r in absent & portal if snapshot[r]["checked"]),
+        # portal shows absent although Excel does not
+        "absent_but_present_in_excel": sorted(r for r in portal - absent
+                                              if not snapshot[r]["checked"] and (roster is None or r in roster)),
+    }
+    if roster is not None:
+        roster = set(roster)
+        v["excel_not_on_roster"] = sorted(roster - portal - absent)
+        v["roster_not_in_excel"] = sorted(portal - roster)
+    return v
+
+VERIFY_LABELS = {
+    "absent_not_on_roster": "Absent in Excel but not on the portal roster",
+    "present_but_absent_in_excel": "Saved as PRESENT but absent in Excel",
+    "absent_but_present_in_excel": "Saved as ABSENT but not absent in Excel",
+    "excel_not_on_roster": "In Excel but missing from the portal roster",
+    "roster_not_in_excel": "On the portal roster but missing from Excel",
+}
+
+def print_verification(v, snapshot=None):
+    issues = {k: ids for k, ids in v.items() if ids}
+    if not issues:
+        print("🔁 Verification: portal matches Excel")
+        return
+    print(f"🔁 Verification: {sum(len(ids) for ids in issues.values())} discrepancy(ies)")
+    for key, ids in issues.items():
+        print(f"   ⚠️ {VERIFY_LABELS.get(key, key)}: {len(ids)}")
+        for r in ids:
+            name = (snapshot or {}).get(r, {}).get("name", "")
+            print(f"      - {r}{'  ' + name if name else ''}")
 
 # =============================
-# 5) Attendance flow (no-absentees → submit directly)
+# 5) Attendance flow (untick absentees → submit)
 # =============================
-if not absentees:
-    print("\n🎉 No absentees. Submitting attendance as-is.")
-    if not open_attendance_tab_robust(driver, click_attendance_tab_fast, max_retries=2):
-        print("⚠️ Could not open the Attendance tab due to a Lightning page error. Skipping submission.")
-        print("\n📊 Attendance Summary")
-        print("✔️ Successfully unticked: 0")
-        print("❌ Not unticked (not found on page): 0")
+@traced()
+def submit_attendance(driver) -> bool:
+    """
+    Submit → confirm → landed, each step a single observer-backed in-page wait:
+    click 'Submit Attendance' once it is enabled, pick the confirm button from
+    all candidate selectors at once and click it, then wait for the success
+    toast (or the modal closing on a settled page).
+    """
+    if wait_dom(driver, "submit_click", step="submit_button") != "clicked":
+        print("⚠️ Could not submit attendance: 'Submit Attendance' button not found")
+        return False
+    print("✅ Clicked Submit Attendance")
+
+    confirm = wait_dom(driver, "confirm_click", step="modal")
+    if confirm:
+        print(f"✅ Confirmed submission ({confirm})")
     else:
-        # Directly submit
+        # No recognisable confirm button — ENTER on the modal as a last resort
         try:
-            submit_btn = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Submit Attendance')]"))
-            )
-            js_click(driver, submit_btn)
-            print("✅ Clicked Submit Attendance")
+            modal = driver.execute_script(
+                "return Array.from(document.querySelectorAll('.modal-container, .uiModal, .slds-modal'))"
+                ".find(e => e.getBoundingClientRect().height > 0) || null;")
+            if not modal:
+                print("⚠️ Could not submit attendance: confirmation modal did not appear")
+                return False
+            modal.send_keys(Keys.ENTER)
+            print("↩️ Sent ENTER to modal (fallback)")
+        except Exception:
+            print("⚠️ Please click Confirm manually.")
+            return False
 
-            modal = WebDriverWait(driver, 22).until(
-                EC.presence_of_element_located((By.XPATH, "//div[contains(@class,'modal-container') or contains(@class,'uiModal') or contains(@class,'slds-modal')]"))
-            )
-            WebDriverWait(driver, 12).until(EC.visibility_of(modal))
-            print("✅ Confirmation modal visible")
-
-            xps = [
-                ".//button[normalize-space()='Confirm Submission']",
-                ".//button[.//span[normalize-space()='Confirm Submission']]",
-                ".//button[contains(.,'Confirm Submission')]",
-                ".//footer//*[self::button or self::*[contains(@class,'slds-button')]][contains(.,'Confirm') and contains(@class,'slds-button_brand')]",
-                ".//button[contains(.,'Confirm') and contains(@class,'slds-button_brand')]",
-            ]
-            clicked = False
-            for xp in xps:
-                try:
-                    btn = WebDriverWait(modal, 8).until(EC.element_to_be_clickable((By.XPATH, xp)))
-                    js_click(driver, btn)
-                    print("✅ Confirmed submission")
-                    clicked = True
-                    break
-                except Exception:
-                    continue
-            if not clicked:
-                btn = driver.execute_script("""
-                    const modal = document.querySelector('.modal-container, .uiModal, .slds-modal');
-                    if (!modal) return null;
-                    const btns = Array.from(modal.querySelectorAll('button, .slds-button'));
-                    const norm = t => (t || '').trim().toLowerCase();
-                    return btns.find(b => {
-                      const txt = norm(b.innerText || b.textContent);
-                      return txt === 'confirm submission' || txt === 'confirm' || txt.includes('confirm submission');
-                    }) || null;
-                """)
-                if btn:
-                    driver.execute_script("arguments[0].click();", btn)
-                    print("✅ Confirmed via JS fallback")
-                else:
-                    try:
-                        modal.send_keys(Keys.ENTER)
-                        print("↩️ Sent ENTER to modal (fallback)")
-                    except Exception:
-                        print("⚠️ Please click Confirm manually.")
-        except Exception as e:
-            print(f"⚠️ Could not submit attendance: {e}")
+    landed = wait_dom(driver, "submitted", step="landed")
+    if not landed:
+        print("⚠️ No confirmation from the portal yet — please verify the submission.")
+        return False
+    if landed.startswith("error:"):
+        print(f"❌ Portal reported: {landed[6:].strip()}")
+        return False
+    print(f"✅ Submission landed{': ' + landed[6:].strip() if landed.startswith('toast:') else ''}")
+    return True
+
+# --diff-only: leave dates whose portal state already matches Excel untouched
+DIFF_ONLY = False
+SUCCESS_STATUSES = ("submitted", "unchanged")
+
+def job_ok(res) -> bool:
+    return res["status"] in SUCCESS_STATUSES
+
+def attendance_diff(snapshot, absentees, roster=None) -> dict:
+    """
+    Rows whose checkbox differs from Excel: "untick" = absent in Excel but
+    ticked on the portal, "tick" = unticked on the portal but not absent in
+    Excel (limited to the Excel roster when given).
+    """
+    absent = set(absentees)
+    return {
+        "untick": sorted(r for r in absent if r in snapshot and snapshot[r]["checked"]),
+        "tick": sorted(r for r, row in snapshot.items()
+                       if not row["checked"] and r not in absent and (roster is None or r in roster)),
+    }
 
-    # Summary for no-absentee run
+def print_attendance_summary(unticked_ids, not_found, stuck=()):
     print("\n📊 Attendance Summary")
-    print("✔️ Successfully unticked: 0")
-    print("❌ Not unticked (not found on page): 0")
-
-else:
-    # There ARE absentees → normal untick flow
-    if not open_attendance_tab_robust(driver, click_attendance_tab_fast, max_retries=2):
-        print("⚠️ Could not open the Attendance tab due to a Lightning page error. Skipping untick & submit.")
-        print("\n📊 Attendance Summary")
-        print("✔️ Successfully unticked: 0")
-        print(f"❌ Not unticked (not found on page): {len(absentees)}")
+    print(f"✔️ Successfully unticked: {len(unticked_ids)}")
+    print(f"❌ Not unticked (not found on page): {len(not_found)}")
+    if not_found:
+        print("👉 IDs not unticked:")
+        for nf in not_found:
+            print(f"   - {nf}")
+    if stuck:
+        print(f"❌ Not unticked (checkbox did not respond): {len(stuck)}")
+        for st in stuck:
+            print(f"   - {st}")
+
+def mark_attendance(driver, absentees, roster=None) -> dict:
+    """
+    Attendance tab → untick absentees → submit → read back, on an already opened
+    event record. The table is snapshotted once to drive the untick, again just
+    before submitting, and read back from a reloaded record once the submission
+    lands to verify against Excel. With
+    --diff-only a date whose table already matches Excel is not resubmitted
+    (status "unchanged"), and students wrongly left unticked are re-ticked.
+    """
+    result = {"status": "", "unticked": [], "already": [], "not_found": []}
+
+    if not absentees:
+        print("\n🎉 No absentees. Submitting attendance as-is.")
+    if not open_attendance_tab_robust(driver, click_attendance_tab_fast):
+        if absentees:
+            print("⚠️ Could not open the Attendance tab due to a Lightning page error. Skipping untick & submit.")
+        else:
+            print("⚠️ Could not open the Attendance tab due to a Lightning page error. Skipping submission.")
+        result["status"] = "attendance tab error"
+        result["not_found"] = list(absentees)
+        print_attendance_summary([], result["not_found"])
+        return result
+
+    snapshot = snapshot_attendance_table(driver)
+    if snapshot:
+        print(f"📸 Attendance table: {len(snapshot)} student(s), "
+              f"{sum(1 for r in snapshot.values() if not r['checked'])} unticked")
+    if DIFF_ONLY and snapshot:
+        roster_set = set(roster) if roster is not None else None
+        diff = attendance_diff(snapshot, absentees, roster_set)
+        # A fresh class shows everyone ticked, so only an unticked row proves an earlier save
+        if not diff["untick"] and not diff["tick"] and any(not r["checked"] for r in snapshot.values()):
+            print("⏭️ Portal already matches Excel — skipping submission")
+            result["status"] = "unchanged"
+            result["already"] = [ab for ab in absentees if ab in snapshot]
+            result["not_found"] = [ab for ab in absentees if ab not in snapshot]
+            result["verification"] = verify_attendance(snapshot, absentees, roster)
+            return result
+        print(f"🔀 Diff-only: {len(diff['untick'])} to untick, {len(diff['tick'])} to re-tick")
+        if diff["tick"]:
+            ticked = set_rows_checked(driver, diff["tick"], True)
+            result["reticked"] = [r for r in diff["tick"] if ticked.get(r) == "ok"]
+            for r in result["reticked"]:
+                print(f"↩️ Re-ticked (not absent in Excel): {r}")
+    if absentees:
+        print("🔎 Unticking absentees on page (batch)...")
+        results = untick_absentees(driver, absentees, snapshot)
+        for ab in absentees:
+            status = results.get(ab)
+            if status == "unticked":
+                print(f"✔️ Unticked absentee: {ab}")
+                result["unticked"].append(ab)
+            elif status == "already":
+                print(f"ℹ️ Already unticked: {ab}")
+                result["already"].append(ab)
+            elif status == "stuck":
+                print(f"❌ Checkbox did not untick: {ab}")
+                result.setdefault("stuck", []).append(ab)
+            else:
+                print(f"❌ Not found on page: {ab}")
+                result["not_found"].append(ab)
+
+    # --- Final summary in console ---
+    print_attendance_summary(result["unticked"], result["not_found"], result.get("stuck", ()))
+
+    # Submit (only if we managed to open the tab)
+    before = snapshot_attendance_table(driver, wait=False)
+    result["status"] = "submitted" if submit_attendance(driver) else "submit failed"
+
+    # Read back what the portal saved (falls back to the pre-submit state)
+    after = read_back_attendance(driver) if result["status"] == "submitted" else {}
+    if after or before:
+        if not after:
+            print("ℹ️ Could not read the table back after submitting — verifying the pre-submit state.")
+        result["verification"] = verify_attendance(after or before, absentees, roster)
+        print_verification(result["verification"], after or before)
+    return result
+
+def mark_date(driver, target_date, date_col, absentees, setup, href=None, roster=None) -> dict:
+    """
+    Full per-date flow inside an existing browser session. A known record href
+    (argument or event cache) skips the Calendar UI; if that record no longer
+    resolves, the cache entry is dropped and the calendar path is used.
+    """
+    print(f"\n📅 ===== {target_date:%d/%m/%Y} (column: {date_col}) =====")
+    print("Absentees (IDs to untick):", absentees)
+    with span("mark_date", date=target_date.isoformat(), course=setup["course_code"],
+              section=setup["class_section"], absentees=len(absentees)) as attrs:
+        res = _mark_date(driver, target_date, absentees, setup, href, roster)
+        attrs["status"] = res["status"]
+    return res
+
+def _mark_date(driver, target_date, absentees, setup, href, roster) -> dict:
+    try:
+        href = href or get_cached_event(setup, target_date)
+        if href:
+            if open_record_page(driver, href):
+                print("⚡ Opened event record directly (cached link)")
+                return mark_attendance(driver, absentees, roster)
+            print("⚠️ Cached event link no longer resolves — using the Calendar.")
+            invalidate_cached_event(setup, target_date)
+        reason = open_class_for_date(driver, target_date, setup)
+        if reason:
+            return {"status": reason, "unticked": [], "already": [], "not_found": list(absentees)}
+        return mark_attendance(driver, absentees, roster)
+    except Exception as e:
+        print(f"❌ {target_date:%d/%m/%Y} failed: {e}")
+        return {"status": f"error: {e}", "unticked": [], "already": [], "not_found": list(absentees)}
+
+def print_batch_summary(results):
+    print("\n📋 Per-date Summary")
+    for label, d, res in results:
+        mark = "✅" if job_ok(res) else "❌"
+        issues = sum(len(ids) for ids in (res.get("verification") or {}).values())
+        stuck = len(res.get("stuck", ()))
+        print(f"   {mark} {d:%d/%m/%Y}  {label + '  ' if label else ''}{res['status']:<22} "
+              f"unticked={len(res['unticked'])} already={len(res['already'])} not_found={len(res['not_found'])}"
+              f"{f' stuck={stuck}' if stuck else ''}"
+              f"{f'  ⚠️ {issues} discrepancy(ies)' if issues else ''}")
+
+# =============================
+# 6) Workbooks: single file, manifest (JSON/YAML) or folder scan
+# =============================
+REQUIRED_SHEETS = {"Attendance", "Initial Setup"}
+
+def has_required_sheets(path) -> bool:
+    try:
+        wb = open_xlsx(path, read_only=True)
+        try:
+            return REQUIRED_SHEETS.issubset(set(wb.sheetnames))
+        finally:
+            wb.close()
+    except Exception:
+        return False
+
+def scan_workbooks(folder):
+    """Every .xlsx in folder (non-recursive) that has both required sheets."""
+    found = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(".xlsx") or name.startswith("~$"):
+            continue
+        path = os.path.join(folder, name)
+        if has_required_sheets(path):
+            found.append(path)
+        else:
+            print(f"ℹ️ Skipping {name}: no 'Attendance' + 'Initial Setup' sheets")
+    return found
+
+def load_manifest(manifest_path):
+    """
+    Manifest is a list of workbooks, either bare paths or {"path": ..., "dates": [...]}.
+    It may also be wrapped as {"workbooks": [...]}. Relative paths are resolved
+    against the manifest's folder. YAML needs PyYAML; JSON needs nothing extra.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        if manifest_path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML manifests need PyYAML (pip install pyyaml), or use a .json manifest.") from None
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("workbooks", [])
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    for item in data or []:
+        if isinstance(item, str):
+            item = {"path": item}
+        path = item.get("path")
+        if not path:
+            continue
+        if not os.path.isabs(path):
+            path = os.path.join(base, path)
+        dates = item.get("dates")
+        if isinstance(dates, str):
+            dates = [dates]
+        entries.append({"path": path, "dates": dates})
+    return entries
+
+def plan_workbook(path, date_tokens, all_dates):
+    """
+    Load one workbook and resolve its (date, column) jobs.
+    Returns {"path", "label", "df", "setup", "jobs"} or None if it cannot be used.
+    """
+    print(f"\n🗂️  Excel file: {path}")
+    dates = None
+    if not all_dates:
+        dates = expand_date_args(date_tokens) if date_tokens else [datetime.today().date()]
+    attendance_df, setup = load_workbook_cached(path, dates)
+    print_setup(setup)
+    missing = missing_setup_fields(setup)
+    if missing:
+        print("⚠️ Initial Setup is incomplete. Required fields missing:")
+        for m in missing:
+            print(f"   - {m}")
+        print("Please fill these in 'Initial Setup' sheet and re-run.")
+        return None
+
+    # Resolve the dates to mark → [(date, column)]
+    date_index, warnings = build_date_index(attendance_df.columns)
+    for w in warnings:
+        print(f"⚠️ {w}")
+    if all_dates:
+        jobs = date_columns_with_entries(attendance_df)
+        print(f"📅 Using {len(jobs)} date column(s) with entries from the Attendance sheet")
     else:
-        print("🔎 Searching for each absentee ID on page...")
-        unticked_ids = []
-        not_found = []
+        if date_tokens:
+            print(f"📅 Using date(s): {', '.join(str(d) for d in dates)} (from argument)")
+        else:
+            print(f"📅 Using date: {dates[0]} (today)")
+        jobs = []
+        for d in dates:
+            col = date_index.get(d)
+            if col is None:
+                print(f"❌ No column found for {d} in the 'Attendance' sheet.")
+                continue
+            jobs.append((d, col))
+    for d, col in jobs:
+        print(f"✅ Using date column in sheet: {col}")
 
-        def untick_absentee_once(ab):
-            cell = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, f"//lightning-base-formatted-text[normalize-space()='{ab}']"))
-            )
-            row = cell.find_element(By.XPATH, "./ancestor::tr")
-            checkbox = row.find_element(By.XPATH, ".//input[@type='checkbox']")
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", checkbox)
-            if checkbox.is_selected():
-                js_click(driver, checkbox)
-                return True
-            return False
+    try:
+        absent = absence_matrix(attendance_df)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return None
 
-        for ab in absentees:
-            success = False
-            attempts = 0
-            while attempts < 4 and not success:
+    label = f"{setup['course_code']} {setup['semester']} {setup['class_section']}"
+    return {"path": path, "label": label, "df": attendance_df, "absent": absent,
+            "setup": setup, "jobs": jobs}
+
+def run_date_group(driver, target_date, entries):
+    """
+    Mark every (workbook, column) entry that falls on target_date. Cached record
+    links are used first; with more than one course on the same day, the day
+    panel is loaded once and each course's record page is opened straight from
+    its tile href.
+    """
+    setups = [wb["setup"] for wb, _ in entries]
+    hrefs = {i: h for i, h in enumerate(get_cached_event(st, target_date) for st in setups) if h}
+
+    if len(entries) > 1 and len(hrefs) < len(entries):
+        try:
+            if open_day_panel(driver, target_date)[0] is None:
+                for (i, d), href in prefill_event_cache(driver, target_date, setups).items():
+                    if d == target_date:
+                        hrefs.setdefault(i, href)
+        except Exception as e:
+            print(f"⚠️ Could not pre-load the day panel for {target_date:%d/%m/%Y}: {e}")
+
+    results = []
+    for i, (wb, col) in enumerate(entries):
+        absentees = absentees_for(wb["absent"], target_date)
+        if len(entries) > 1:
+            print(f"\n📘 {wb['label']}")
+        res = mark_date(driver, target_date, col, absentees, wb["setup"], href=hrefs.get(i),
+                        roster=roster_for(wb["absent"]))
+        journal_result(wb, target_date, absentees, res)
+        results.append((wb["label"], target_date, res))
+    return results
+
+# =============================
+# 7) Parallel workers: N browsers, each on a cloned profile
+# =============================
+def run_parallel(plan, workers):
+    """
+    Spread (workbook, date) jobs over `workers` independent Chrome sessions.
+    Returns [(label, date, result)] in completion order; each result also
+    carries the worker number and the seconds spent on the job. Jobs the
+    journal has confirmed are dropped from `plan` first.
+    """
+    skip_journaled(plan)
+    jobs = queue.Queue()
+    for wb in plan:
+        for d, col in wb["jobs"]:
+            jobs.put((wb, d, col))
+    total = jobs.qsize()
+    if not total:
+        return []
+    workers = max(1, min(workers, total))
+    results, lock = [], threading.Lock()
+
+    # Resolve chromedriver once; concurrent installs race on the same cache dir
+    driver_path = resolve_chromedriver()
+
+    def worker(n):
+        profile = None
+        driver = None
+        try:
+            profile = clone_profile(prefix=f"slcm_worker{n}_")
+            driver = start_driver(profile, driver_path)
+            driver = bootstrap_session(driver, interactive=False)
+            while True:
                 try:
-                    if untick_absentee_once(ab):
-                        print(f"✔️ Unticked absentee: {ab}")
-                        unticked_ids.append(ab)
-                    else:
-                        print(f"ℹ️ Already unticked: {ab}")
-                    success = True
-                except (StaleElementReferenceException, TimeoutException):
-                    attempts += 1
-                    time.sleep(0.3)
-                except Exception:
+                    wb, d, col = jobs.get_nowait()
+                except queue.Empty:
                     break
-            if not success:
-                print(f"❌ Not found on page: {ab}")
-                not_found.append(ab)
-
-        # --- Final summary in console ---
-        print("\n📊 Attendance Summary")
-        print(f"✔️ Successfully unticked: {len(unticked_ids)}")
-        print(f"❌ Not unticked (not found on page): {len(not_found)}")
-        if not_found:
-            print("👉 IDs not unticked:")
-            for nf in not_found:
-                print(f"   - {nf}")
-
-        # Submit (only if we managed to open the tab)
+                t0 = time.time()
+                absentees = absentees_for(wb["absent"], d)
+                res = mark_date(driver, d, col, absentees, wb["setup"], roster=roster_for(wb["absent"]))
+                journal_result(wb, d, absentees, res)
+                res.update(worker=n, seconds=round(time.time() - t0, 2))
+                with lock:
+                    results.append((wb["label"], d, res))
+        except Exception as e:
+            print(f"❌ Worker {n} stopped: {e}")
+        finally:
+            if driver:
+                try: driver.quit()
+                except Exception: pass
+            if profile:
+                shutil.rmtree(profile, ignore_errors=True)
+
+    print(f"🧵 Running {total} job(s) on {workers} browser worker(s)")
+    start = time.time()
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(1, workers + 1)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+
+    # Jobs left over when every worker died
+    while not jobs.empty():
+        wb, d, col = jobs.get_nowait()
+        results.append((wb["label"], d, {"status": "no worker available", "unticked": [], "already": [],
+                                         "not_found": absentees_for(wb["absent"], d)}))
+
+    done = sum(1 for _, _, r in results if job_ok(r))
+    rate = done / (elapsed / 60) if elapsed > 0 else 0.0
+    print(f"\n⏱️ {done}/{total} job(s) submitted in {elapsed:.1f}s — {rate:.2f} jobs/min")
+    return results
+
+# =============================
+# 7b) Async orchestrator: Excel planning pipelined ahead of N browser sessions
+# =============================
+JOB_TIMEOUT_SECS = 300  # --job-timeout
+
+class BrowserSlot:
+    """
+    One browser session pinned to its own thread (WebDriver objects are not
+    thread-safe); every driver call for the session runs on that thread.
+    """
+    def __init__(self, n, shared_profile=False):
+        self.n = n
+        self.shared_profile = shared_profile  # a single session can use the saved profile directly
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"slcm-session{n}")
+        self.driver = None
+        self.profile = None
+        self.generation = 0  # bumped by reset(); a start() that outlives a reset discards its browser
+
+    async def call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def start(self):
+        """
+        Launch + bootstrap (on the slot thread). The driver is kept as soon as
+        Chrome is up, so a failed or timed-out bootstrap can still be quit.
+        """
+        gen = self.generation
+        if self.shared_profile and prepare_profile_dir():
+            profile = PROFILE_DIR
+        else:
+            profile = clone_profile(prefix=f"slcm_worker{self.n}_")
+        self.profile = profile
+        driver = start_driver(profile)
+        if gen != self.generation:
+            # reset() ran while Chrome was launching (start timed out)
+            self._discard(driver, profile)
+            raise RuntimeError(f"session {self.n} was reset while starting")
+        self.driver = driver
         try:
-            submit_btn = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Submit Attendance')]"))
-            )
-            js_click(driver, submit_btn)
-            print("✅ Clicked Submit Attendance")
+            self.driver = bootstrap_session(driver, interactive=False)
+        except BaseException:
+            if gen == self.generation:
+                self.reset()
+            raise
+
+    @staticmethod
+    def _discard(driver, profile):
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        if profile and profile != PROFILE_DIR:
+            shutil.rmtree(profile, ignore_errors=True)
+
+    def reset(self):
+        """
+        Quit the browser (blocking; run it off the event loop). A command
+        blocked on the slot thread then fails fast, so the slot is free for the
+        next start().
+        """
+        driver, profile = self.driver, self.profile
+        self.driver = self.profile = None
+        self.generation += 1
+        self._discard(driver, profile)
+
+    def close(self):
+        self.reset()
+        self.executor.shutdown(wait=False)
+
+async def orchestrate(jobs, sessions=1, job_timeout=None, on_result=None):
+    """
+    Run jobs (see plan_jobs) on `sessions` browsers. Workbooks are planned on
+    their own thread one at a time and their (date, column) jobs are queued as
+    soon as each is ready, so browsers start working while later workbooks are
+    still being parsed. Each job gets `job_timeout` seconds; a job that overruns
+    is reported as timed out and its browser is restarted. on_result(label,
+    date, result) is called as each job finishes. Jobs the checkpoint journal
+    has confirmed are skipped. Returns ([(label, date, result)], skipped count).
+    """
+    loop = asyncio.get_running_loop()
+    job_timeout = job_timeout or JOB_TIMEOUT_SECS
+    pending = asyncio.Queue(maxsize=sessions * 2)  # planning stays just ahead of the browsers
+    planner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slcm-plan")
+    results, skipped = [], 0
+    journal = load_journal()
+
+    async def plan():
+        nonlocal skipped
+        try:
+            for job in jobs:
+                try:
+                    planned = await loop.run_in_executor(planner, plan_jobs, [job])
+                except Exception as e:
+                    print(f"❌ Could not plan {job}: {e}")
+                    continue
+                skipped += skip_journaled(planned, journal)
+                for wb in planned:
+                    for d, col in wb["jobs"]:
+                        await pending.put((wb, d, col))
+        finally:
+            for _ in range(sessions):
+                await pending.put(None)
+
+    async def session(n):
+        slot = BrowserSlot(n, shared_profile=sessions == 1)
+        try:
+            while (item := await pending.get()) is not None:
+                wb, d, col = item
+                absentees = absentees_for(wb["absent"], d)
+                t0 = time.time()
+                try:
+                    if slot.driver is None:
+                        await asyncio.wait_for(slot.call(slot.start), job_timeout)
+                    res = await asyncio.wait_for(
+                        slot.call(mark_date, slot.driver, d, col, absentees, wb["setup"], None,
+                                  roster_for(wb["absent"])),
+                        job_timeout)
+                except asyncio.TimeoutError:
+                    print(f"⏰ {wb['label']} {d:%d/%m/%Y}: no result after {job_timeout:.0f}s — restarting session {n}")
+                    await loop.run_in_executor(None, slot.reset)
+                    res = {"status": "timed out", "unticked": [], "already": [], "not_found": list(absentees)}
+                except Exception as e:
+                    print(f"❌ Session {n} could not start: {e}")
+                    await loop.run_in_executor(None, slot.reset)
+                    res = {"status": f"error: {e}", "unticked": [], "already": [], "not_found": list(absentees)}
+                journal_result(wb, d, absentees, res)
+                res.update(worker=n, seconds=round(time.time() - t0, 2))
+                results.append((wb["label"], d, res))
+                if on_result:
+                    on_result(wb["label"], d, res)
+        finally:
+            await loop.run_in_executor(None, slot.close)
+
+    print(f"🧵 Orchestrating jobs on {sessions} browser session(s), {job_timeout:.0f}s per job")
+    start = time.time()
+    try:
+        await asyncio.gather(plan(), *(session(n) for n in range(1, sessions + 1)))
+    finally:
+        planner.shutdown(wait=False)
+    elapsed = time.time() - start
+    done = sum(1 for _, _, r in results if job_ok(r))
+    rate = done / (elapsed / 60) if elapsed > 0 else 0.0
+    print(f"\n⏱️ {done}/{len(results)} job(s) submitted in {elapsed:.1f}s — {rate:.2f} jobs/min")
+    return results, skipped
+
+def print_streamed_result(label, d, res):
+    mark = "✅" if job_ok(res) else "❌"
+    print(f"📬 {mark} [session {res.get('worker')}] {label} {d:%d/%m/%Y}: {res['status']} ({res.get('seconds')}s)")
+
+def save_results_json(path, results):
+    rows = [dict(res, course=label, date=d.isoformat()) for label, d, res in results]
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"💾 Saved results to {path}")
+    except Exception as e:
+        print(f"⚠️ Could not save results: {e}")
 
-            modal = WebDriverWait(driver, 22).until(
-                EC.presence_of_element_located((By.XPATH, "//div[contains(@class,'modal-container') or contains(@class,'uiModal') or contains(@class,'slds-modal')]"))
-            )
-            WebDriverWait(driver, 12).until(EC.visibility_of(modal))
-            print("✅ Confirmation modal visible")
-
-            xps = [
-                ".//button[normalize-space()='Confirm Submission']",
-                ".//button[.//span[normalize-space()='Confirm Submission']]",
-                ".//button[contains(.,'Confirm Submission')]",
-                ".//footer//*[self::button or self::*[contains(@class,'slds-button')]][contains(.,'Confirm') and contains(@class,'slds-button_brand')]",
-                ".//button[contains(.,'Confirm') and contains(@class,'slds-button_brand')]",
-            ]
-            clicked = False
-            for xp in xps:
+# =============================
+# 8) Driver daemon: one warm, logged-in Chrome that later runs attach to
+# =============================
+DAEMON_STATE_FILE = os.path.join(BASE_DIR, "slcm_daemon.json")
+DAEMON_LOCK_FILE  = os.path.join(BASE_DIR, "slcm_daemon.lock")
+DAEMON_STOP_FILE  = os.path.join(BASE_DIR, "slcm_daemon.stop")
+DAEMON_KEEPALIVE_SECS = 600
+
+def _port_open(port, host="127.0.0.1") -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+def daemon_running() -> bool:
+    """True when slcm_daemon.json names a port that still accepts connections."""
+    try:
+        with open(DAEMON_STATE_FILE, "r", encoding="utf-8") as f:
+            port = json.load(f).get("port")
+    except Exception:
+        return False
+    return bool(port) and _port_open(port)
+
+def _pid_alive(pid) -> bool:
+    """Whether process `pid` still exists (signal 0 on POSIX; os.kill would terminate it on Windows)."""
+    if pid <= 0:
+        return False
+    if sys.platform.startswith("win"):
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        try:
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+def run_daemon(port):
+    """
+    Start Chrome on the dedicated profile with a remote-debugging port, log in,
+    and keep the session warm until Ctrl+C or `--stop-daemon`.
+    """
+    if _port_open(port):
+        print(f"❌ Port {port} is already in use (daemon already running?).")
+        return 1
+    if not prepare_profile_dir():
+        print("❌ A daemon is already running on the dedicated profile (`--stop-daemon` first).")
+        return 1
+    driver_path = resolve_chromedriver()
+    opts = build_options(PROFILE_DIR, fast=False)  # clients may need the window for SSO
+    opts.add_argument(f"--remote-debugging-port={port}")
+    driver = instrument_driver(webdriver.Chrome(service=Service(driver_path), options=opts))
+    try:
+        bootstrap_session(driver)
+        with open(DAEMON_STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"port": port, "pid": os.getpid(), "driver_path": driver_path}, f, indent=2)
+        for stale in (DAEMON_STOP_FILE, DAEMON_LOCK_FILE):
+            if os.path.exists(stale):
+                os.remove(stale)
+        print(f"🟢 Daemon ready on 127.0.0.1:{port}. Run `python maa.py <date>` from another terminal.")
+        print("   Stop with Ctrl+C or `python maa.py --stop-daemon`.")
+        last_ping = time.time()
+        while not os.path.exists(DAEMON_STOP_FILE):
+            time.sleep(1)
+            if time.time() - last_ping >= DAEMON_KEEPALIVE_SECS:
+                last_ping = time.time()
                 try:
-                    btn = WebDriverWait(modal, 8).until(EC.element_to_be_clickable((By.XPATH, xp)))
-                    js_click(driver, btn)
-                    print("✅ Confirmed submission")
-                    clicked = True
-                    break
+                    # Background fetch keeps the Lightning session alive without navigating
+                    driver.execute_script("fetch(arguments[0], {credentials:'include'}).catch(()=>{});", HOME_URL)
+                    driver.window_handles
                 except Exception:
+                    print("⚠️ Daemon browser is gone — exiting.")
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for f in (DAEMON_STATE_FILE, DAEMON_STOP_FILE, DAEMON_LOCK_FILE):
+            try: os.remove(f)
+            except Exception: pass
+        try: driver.quit()
+        except Exception: pass
+        print("🔴 Daemon stopped.")
+    return 0
+
+def stop_daemon():
+    if not os.path.exists(DAEMON_STATE_FILE):
+        print("ℹ️ No daemon is running.")
+        return 0
+    open(DAEMON_STOP_FILE, "w").close()
+    print("🛑 Stop requested.")
+    return 0
+
+def _acquire_daemon_lock(timeout=600) -> bool:
+    """
+    One client at a time drives the daemon's tab. A lock whose owner PID has
+    exited is stale and taken over at once; otherwise it expires after `timeout`.
+    """
+    start = time.time()
+    announced = False
+    while time.time() - start < timeout:
+        try:
+            fd = os.open(DAEMON_LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            return True
+        except FileExistsError:
+            try:
+                with open(DAEMON_LOCK_FILE, "r", encoding="utf-8") as f:
+                    owner = f.read().strip()
+                # An empty file is a client between O_EXCL and its write — not stale yet
+                if (owner.isdigit() and not _pid_alive(int(owner))) or \
+                        time.time() - os.path.getmtime(DAEMON_LOCK_FILE) > timeout:
+                    os.remove(DAEMON_LOCK_FILE)
                     continue
-            if not clicked:
-                btn = driver.execute_script("""
-                    const modal = document.querySelector('.modal-container, .uiModal, .slds-modal');
-                    if (!modal) return null;
-                    const btns = Array.from(modal.querySelectorAll('button, .slds-button'));
-                    const norm = t => (t || '').trim().toLowerCase();
-                    return btns.find(b => {
-                      const txt = norm(b.innerText || b.textContent);
-                      return txt === 'confirm submission' || txt === 'confirm' || txt.includes('confirm submission');
-                    }) || null;
-                """)
-                if btn:
-                    driver.execute_script("arguments[0].click();", btn)
-                    print("✅ Confirmed via JS fallback")
-                else:
-                    try:
-                        modal.send_keys(Keys.ENTER)
-                        print("↩️ Sent ENTER to modal (fallback)")
-                    except Exception:
-                        print("⚠️ Please click Confirm manually.")
-        except Exception as e:
-            print(f"⚠️ Could not submit attendance: {e}")
+            except OSError:
+                continue
+            if not announced:
+                print("⏳ Daemon is busy with another run — waiting…")
+                announced = True
+            time.sleep(1)
+    return False
+
+def connect_daemon():
+    """Attach to a running daemon's Chrome, or return None to start a fresh browser."""
+    try:
+        with open(DAEMON_STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return None
+    port = state.get("port")
+    if not port or not _port_open(port):
+        return None
+    if not _acquire_daemon_lock():
+        print("⚠️ Timed out waiting for the daemon — starting a fresh browser.")
+        return None
+    try:
+        opts = webdriver.ChromeOptions()
+        opts.debugger_address = f"127.0.0.1:{port}"
+        service = Service(state.get("driver_path") or resolve_chromedriver())
+        driver = instrument_driver(webdriver.Chrome(service=service, options=opts))
+    except Exception as e:
+        print(f"⚠️ Could not attach to daemon ({e}) — starting a fresh browser.")
+        release_daemon(None)
+        return None
+    print(f"🔗 Attached to daemon Chrome on 127.0.0.1:{port}")
+    return driver
+
+def release_daemon(driver):
+    """Detach without closing the daemon's browser."""
+    if driver is not None:
+        try: driver.service.stop()
+        except Exception: pass
+    try: os.remove(DAEMON_LOCK_FILE)
+    except Exception: pass
+
+def ensure_lightning(driver):
+    """Skip the full bootstrap when the attached session is already inside Lightning. Returns the driver."""
+    if "lightning.force.com" in (driver.current_url or "") and \
+            driver.find_elements(By.XPATH, "//a[@title='Calendar']"):
+        print("✅ Reusing logged-in Lightning session")
+        return driver
+    return bootstrap_session(driver)
 
 # =============================
-# 6) Done + credit + temp profile cleanup
+# 9) Library API: the same flow from a scheduler or batch runner
 # =============================
-print("\n🎉 Attendance marking complete!")
-time.sleep(1.5)
-driver.quit()
+def plan_jobs(jobs):
+    """
+    Resolve jobs without a browser. A job is a workbook path or a dict
+    {"workbook": path, "dates": [tokens], "all_dates": bool}; dates default to today.
+    Returns the usable plan_workbook() entries (workbooks with no jobs, or that
+    cannot be read, are reported and dropped).
+    """
+    plan = []
+    for job in jobs:
+        if isinstance(job, (str, os.PathLike)):
+            job = {"workbook": job}
+        path = os.fspath(job["workbook"])
+        if not os.path.exists(path):
+            print(f"❌ Excel file not found: {path}")
+            continue
+        dates = job.get("dates") or ([job["date"]] if job.get("date") else [])
+        try:
+            wb = plan_workbook(path, [d if isinstance(d, str) else f"{d:%d/%m/%Y}" for d in dates],
+                               job.get("all_dates", False))
+        except ValueError as e:
+            print(f"❌ Skipping {path}: {e}")
+            continue
+        if wb and wb["jobs"]:
+            plan.append(wb)
+    return plan
+
+def print_plan(plan):
+    """What a run would do: absentees per workbook and date (--dry-run)."""
+    print("\n📝 Dry run — nothing will be submitted")
+    skip_journaled(plan)
+    for wb in plan:
+        print(f"\n📘 {wb['label']}  ({wb['path']})")
+        for d, _ in wb["jobs"]:
+            absentees = absentees_for(wb["absent"], d)
+            print(f"   {d:%d/%m/%Y}: {len(absentees)} absentee(s){': ' + ', '.join(absentees) if absentees else ''}")
+
+class AttendanceSession:
+    """
+    One logged-in browser for marking attendance from Python:
 
-# Clean up temp profile if we used one
-if 'TEMP_PROFILE_DIR' in globals() and TEMP_PROFILE_DIR:
-    try: shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
-    except Exception: pass
+        with AttendanceSession() as session:
+            results = session.run({"workbook": "os_lab.xlsx", "dates": ["30/07/2025"]})
 
-print("\n====================================================")
-print("👨‍💻 Developed by: Anirudhan Adukkathayar C, SCE, MIT")
-print("====================================================\n")
+    Attaches to a running daemon (unless use_daemon=False), otherwise starts
+    Chrome on the saved profile, falling back to a temp profile if it is locked.
+    Non-interactive sessions raise instead of waiting for SSO.
+    """
+    def __init__(self, use_daemon=True, interactive=True, measure_blocking=False):
+        self.use_daemon = use_daemon
+        self.interactive = interactive
+        self.measure_blocking = measure_blocking
+        self.driver = None
+        self.attached = False
+
+    def open(self):
+        if self.driver is not None:
+            return self
+        driver = connect_daemon() if self.use_daemon else None
+        self.attached = driver is not None
+        if self.attached:
+            self.driver = driver
+            try:
+                self.driver = ensure_lightning(driver)
+            except Exception:
+                self.close()
+                raise
+            return self
+        self.driver = start_driver_with_fallback()
+        print(f"👤 Using Chrome profile dir: {TEMP_PROFILE_DIR or PROFILE_DIR}")
+        try:
+            self.driver = bootstrap_session(self.driver, interactive=self.interactive)
+            if self.measure_blocking:
+                compare_asset_blocking(self.driver)
+                set_asset_blocking(self.driver, getattr(self.driver, "_maa_fast", False))
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def close(self, settle=False):
+        """Detach from the daemon or quit Chrome; settle=True lets a last submission finish first."""
+        if self.driver is None:
+            return
+        try:
+            if settle:
+                wait_idle(self.driver, step="finish")
+        finally:
+            if self.attached:
+                release_daemon(self.driver)
+            else:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+                cleanup_temp_profile()
+            self.driver = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close(settle=exc[0] is None)
+
+    def run_plan(self, plan):
+        """
+        Mark every (workbook, date) of a plan, one Calendar visit per date → [(label, date, result)].
+        Jobs the journal has confirmed are dropped from `plan` first; no browser
+        is opened when nothing is left.
+        """
+        skip_journaled(plan)
+        if not plan:
+            return []
+        self.open()
+        by_date = {}
+        for wb in plan:
+            for d, col in wb["jobs"]:
+                by_date.setdefault(d, []).append((wb, col))
+        results = []
+        for d in sorted(by_date):
+            results.extend(run_date_group(self.driver, d, by_date[d]))
+        return results
+
+    def run(self, job):
+        """Plan and mark one job (see plan_jobs) → [(label, date, result)]."""
+        return self.run_plan(plan_jobs([job]))
+
+def run(job, **session_options):
+    """
+    One-shot: open a session, mark `job`, close. Options go to AttendanceSession.
+    The browser is only started when the journal leaves something to submit.
+    """
+    session = AttendanceSession(**session_options)
+    results = None
+    try:
+        results = session.run(job)
+        return results
+    finally:
+        session.close(settle=results is not None)
 
+# =============================
+# 10) Main: resolve workbooks + dates, one browser session for every job
+# =============================
+def main(argv=None):
+    args = parse_cli(argv)
+    set_wait_timeouts(args.timeout)
+    global EVENT_CACHE_ENABLED, EXCEL_CACHE_ENABLED, FAST_BROWSER, SHOW_MATCH_DIAGNOSTICS, TRACE_ENABLED, PROFILE_COMMANDS
+    global JOURNAL_ENABLED, JOURNAL_FORCE, DIFF_ONLY
+    SHOW_MATCH_DIAGNOSTICS = args.debug_match
+    FAST_BROWSER = args.fast
+    EVENT_CACHE_ENABLED = not args.no_event_cache
+    EXCEL_CACHE_ENABLED = not args.no_excel_cache
+    TRACE_ENABLED = not args.no_trace
+    PROFILE_COMMANDS = args.profile_commands
+    JOURNAL_ENABLED = not args.no_journal
+    JOURNAL_FORCE = args.force
+    DIFF_ONLY = args.diff_only
+
+    if args.trace_report is not None:
+        return trace_report(args.trace_report or None)
+    if args.daemon:
+        return run_daemon(args.port)
+    if args.stop_daemon:
+        return stop_daemon()
+
+    start_trace()
+    if args.manifest or args.scan:
+        try:
+            entries = load_manifest(args.manifest) if args.manifest else [
+                {"path": p, "dates": None} for p in scan_workbooks(args.scan)
+            ]
+        except ValueError as e:
+            print(f"❌ Could not read manifest: {e}")
+            return 1
+        jobs = [{"workbook": e["path"], "dates": e["dates"] or args.dates, "all_dates": args.all_dates}
+                for e in entries]
+    else:
+        file_path = resolve_excel_path("./attendance.xlsx")
+        jobs = [{"workbook": file_path, "dates": args.dates, "all_dates": args.all_dates}]
+
+    results = []
+    if args.use_async and not args.dry_run:
+        # Workbooks are planned inside the orchestrator, overlapping browser work
+        results, skipped = asyncio.run(orchestrate(jobs, max(1, args.workers), args.job_timeout,
+                                                   print_streamed_result))
+        if not results and skipped:
+            print("✅ Every job is already submitted (see slcm_journal.jsonl; --force to redo).")
+            return 0
+        if not results:
+            print("❌ No column found for the specified date in the 'Attendance' sheet.")
+            sys.exit(1)
+        print("\n🎉 Attendance marking complete!")
+    else:
+        plan = plan_jobs(jobs)
+        if not plan:
+            print("❌ No column found for the specified date in the 'Attendance' sheet.")
+            sys.exit(1)
+        if args.dry_run:
+            print_plan(plan)
+            return 0
+
+        if args.workers > 1:
+            prepare_profile_dir()
+            results = run_parallel(plan, args.workers)
+            if results:
+                print("\n🎉 Attendance marking complete!")
+        else:
+            session = AttendanceSession(use_daemon=not args.no_daemon, measure_blocking=args.measure_blocking)
+            try:
+                results = session.run_plan(plan)
+            finally:
+                # =============================
+                # Done + credit + temp profile cleanup
+                # =============================
+                if results:
+                    print("\n🎉 Attendance marking complete!")
+                session.close(settle=bool(results))
+        if not plan:  # the journal had every job confirmed
+            print("✅ Every job is already submitted (see slcm_journal.jsonl; --force to redo).")
+            return 0
+
+    if args.results_json:
+        save_results_json(args.results_json, results)
+
+    if len(results) > 1:
+        print_batch_summary(results if len(jobs) > 1 else [("", d, res) for _, d, res in results])
+    finish_trace()
+    if PROFILE_COMMANDS:
+        print_command_profile()
+    print_recovery_stats()
+
+    print("\n====================================================")
+    print("👨‍💻 Developed by: Anirudhan Adukkathayar C, SCE, MIT")
+    print("====================================================\n")
+
+    return 0 if all(job_ok(res) for _, _, res in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())